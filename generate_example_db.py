@@ -135,6 +135,9 @@ def main() -> None:
             except Exception as e:
                 print(f"  ✗ Failed to load archive: {e}")
 
+    # The repository keeps its connection open until closed
+    repo.close()
+
 
 if __name__ == "__main__":
     try:
@@ -29,7 +29,7 @@ class Algo(enum.IntEnum):
 Self = typing.TypeVar("Self", bound="FileEntry")
 
 
-@dataclasses.dataclass(slots=True, eq=True)
+@dataclasses.dataclass(slots=True, eq=False)
 class FileEntry:
     """
     Represents a file in a hash-based collection (SFV, RAR, etc.).
@@ -38,7 +38,8 @@ class FileEntry:
     DO NOT mix FileEntry instances from different containers unless
     their paths are guaranteed to be unique.
 
-    This class is mutable to allow gradual enrichment (e.g. adding hashes).
+    This class is mutable to allow gradual enrichment (e.g. adding hashes),
+    but the path is its identity and must not be reassigned.
     """
 
     path: pathlib.PurePath
@@ -47,13 +48,68 @@ class FileEntry:
     hash_value: bytes | None = None
     algo: Algo | None = None
     info: str | None = None
+    # String form and hash of the path, computed once since both are hot in sets and SQL rows
+    _path_str: str = dataclasses.field(init=False, repr=False, compare=False)
+    _path_hash: int = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._path_str = str(self.path)
+        self._path_hash = hash(self.path)
+
+    @classmethod
+    def from_path_str(
+        cls: type[Self],
+        path_str: str,
+        size: int | None,
+        is_dir: bool,
+        hash_value: bytes | None = None,
+        algo: Algo | None = None,
+    ) -> Self:
+        """Build an entry from a path string that is already in str(PurePath) form.
+
+        Meant for rows read back from storage, where the string was written from
+        str_path. Skips the generated __init__ and reuses path_str as the cached
+        string instead of re-rendering it from the PurePath.
+        """
+        path = pathlib.PurePath(path_str)
+        entry = object.__new__(cls)
+        entry.path = path
+        entry.size = size
+        entry.is_dir = is_dir
+        entry.hash_value = hash_value
+        entry.algo = algo
+        entry.info = None
+        entry._path_str = path_str
+        entry._path_hash = hash(path)
+        return entry
+
+    @property
+    def str_path(self) -> str:
+        """The path as a string, computed once at construction."""
+        return self._path_str
 
     def __lt__(self: Self, other: Self) -> bool:
         return self.path < other.path
 
+    @override
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        other = typing.cast(FileEntry, other)
+        # The cached path hash rejects most non-equal entries without touching PurePath
+        return (
+            self._path_hash == other._path_hash
+            and self.path == other.path
+            and self.size == other.size
+            and self.is_dir == other.is_dir
+            and self.hash_value == other.hash_value
+            and self.algo == other.algo
+            and self.info == other.info
+        )
+
     @override
     def __hash__(self) -> int:
-        return hash(self.path)
+        return self._path_hash
 
 
 T = typing.TypeVar("T", bound="HashArchive")
@@ -62,34 +118,58 @@ T = typing.TypeVar("T", bound="HashArchive")
 class HashArchive(abc.ABC):
     """This class contains information about an hash file."""
 
+    __slots__ = ("storage_path", "path", "files", "is_deleted", "info")
+
     storage_path: pathlib.Path
     path: pathlib.PurePath
-    files: set[FileEntry]
+    files: dict[str, FileEntry]
     is_deleted: bool
-    info: str | None = None
+    info: str | None
 
     # Indicates whether the archive file itself (e.g., .sfv, .rar) can safely be deleted after processing.
     # Most archives are deletable without consequence, except for special cases like HashNameArchive,
     # where the archive is essentially the file itself and must not be deleted.
     DELETABLE: typing.ClassVar[bool] = True
 
+    # Public attribute names shown by __repr__ and to_presentation, computed once per class.
+    _PRINT_ATTRS: typing.ClassVar[tuple[str, ...]] = ()
+    # The subset of _PRINT_ATTRS shown as scalar header fields by to_presentation.
+    _HEADER_ATTRS: typing.ClassVar[tuple[str, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Instance state lives in slots, so collect the public slot names along the MRO;
+        # info is free-form and stays out of repr and presentation output
+        cls._PRINT_ATTRS = tuple(
+            sorted(
+                a
+                for klass in cls.__mro__
+                for a in getattr(klass, "__slots__", ())
+                if not a.startswith("_") and a != "info"
+            )
+        )
+        cls._HEADER_ATTRS = tuple(
+            a for a in cls._PRINT_ATTRS if a not in ("files", "path", "storage_path")
+        )
+
     def __init__(
         self,
         storage_path: pathlib.Path,
         path: pathlib.PurePath,
-        files: set[FileEntry] | None = None,
+        files: collections.abc.Iterable[FileEntry] | None = None,
     ) -> None:
         """Create a HashArchive object.
 
         Args:
             storage_path: The storage directory path (explicitly set, not inferred)
             path: The relative path from storage_path (as PurePath)
-            files: Optional set of FileEntry objects
+            files: Optional FileEntry objects, indexed by their path string
         """
-        self.files = files or set()
+        self.files = {fe.str_path: fe for fe in files} if files is not None else {}
         self.storage_path = storage_path.resolve()
         self.path = path
         self.is_deleted = True
+        self.info = None
 
     @property
     def full_path(self) -> pathlib.Path:
@@ -134,25 +214,16 @@ class HashArchive(abc.ABC):
         return len(self.files)
 
     def __iter__(self) -> collections.abc.Iterator[FileEntry]:
-        return iter(self.files)
-
-    def _printable_attributes(self):
-        return [
-            a
-            for a in dir(self)
-            if not a.startswith("_")
-            and not callable(getattr(self, a))
-            and not hasattr(type(self), a)
-        ]
+        return iter(self.files.values())
 
     @override
     def __repr__(self) -> str:
         class_name = self.__class__.__name__
         d: dict[str, str | list[str]] = {}
         d["class_name"] = class_name
-        for attr in self._printable_attributes():
+        for attr in type(self)._PRINT_ATTRS:
             d[attr] = getattr(self, attr)
-        d["files"] = sorted([repr(f) for f in self.files])
+        d["files"] = sorted([repr(f) for f in self.files.values()])
         return str(dict(sorted(d.items())))
 
     def to_presentation(self) -> PresentationSpec:
@@ -166,16 +237,14 @@ class HashArchive(abc.ABC):
             "type": self.__class__.__name__,
             "path": str(self.full_path),
         }
-        header_fields = self._printable_attributes()
-        excluded_fields = {"files", "path", "storage_path"}
-        for attr in filter(lambda a: a not in excluded_fields, header_fields):
+        for attr in type(self)._HEADER_ATTRS:
             scalar[attr] = getattr(self, attr)
 
         # Build collection rows for files
         collection: list[dict[str, ScalarValue]] = []
         for file in sorted(self):
             row: dict[str, ScalarValue] = {
-                "path": str(file.path),
+                "path": file.str_path,
                 "type": "D" if file.is_dir else "F",
                 "size": file.size,
                 "hash": file.hash_value.hex() if file.hash_value else None,
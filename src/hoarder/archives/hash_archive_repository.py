@@ -1,7 +1,8 @@
 import collections.abc
+import itertools
 import sqlite3
 from pathlib import Path, PurePath
-from typing import cast
+from typing import Any, TypeVar, cast
 
 from .hash_archive import Algo, FileEntry, HashArchive
 from .hash_name_archive import HashEnclosure, HashNameArchive
@@ -9,6 +10,123 @@ from .rar_archive import RarArchive
 from .rar_path import RarScheme
 from .sfv_archive import SfvArchive
 
+# Column order shared by every archive type; unused columns are bound as NULL
+_ARCHIVE_COLUMNS: tuple[str, ...] = (
+    "type",
+    "path",
+    "is_deleted",
+    "hash_enclosure",
+    "password",
+    "rar_scheme",
+    "rar_version",
+    "n_volumes",
+)
+
+# Built once so sqlite3's statement cache sees the exact same SQL text on every save.
+# Upserting keeps the archive id stable, so rows referencing it are not cascaded away.
+_UPSERT_ARCHIVE_SQL = f"""
+    INSERT INTO hash_archives ({', '.join(_ARCHIVE_COLUMNS)}, storage_path_id)
+    VALUES (
+        {', '.join('?' for _ in _ARCHIVE_COLUMNS)},
+        (SELECT id FROM storage_paths WHERE storage_path = ?)
+    )
+    ON CONFLICT(storage_path_id, path) DO UPDATE SET
+        {', '.join(f'{c} = excluded.{c}' for c in _ARCHIVE_COLUMNS if c != 'path')}
+    RETURNING id
+"""
+
+# file_entries columns in the order _build_fileentry_rows yields them
+_FE_COLS: tuple[str, ...] = (
+    "path",
+    "size",
+    "is_dir",
+    "hash_value",
+    "algo",
+    "archive_id",
+)
+
+_FE_INSERT_SQL = f"""
+    INSERT INTO file_entries ({', '.join(_FE_COLS)})
+    VALUES ({', '.join('?' for _ in _FE_COLS)})
+"""
+
+# Archive columns read back by load(), followed by the joined storage path
+_LOAD_ARCHIVE_KEYS: tuple[str, ...] = _ARCHIVE_COLUMNS + ("storage_path",)
+
+_LOAD_ARCHIVE_SQL = f"""
+    SELECT {', '.join(f'hash_archives.{c}' for c in _ARCHIVE_COLUMNS)},
+           storage_paths.storage_path,
+           file_entries.path,
+           file_entries.size,
+           file_entries.is_dir,
+           file_entries.hash_value,
+           file_entries.algo
+    FROM hash_archives
+    JOIN storage_paths ON hash_archives.storage_path_id = storage_paths.id
+    LEFT JOIN file_entries ON file_entries.archive_id = hash_archives.id
+    WHERE storage_paths.storage_path = ? AND hash_archives.path = ?;
+"""
+
+# Algo members by their stored integer value; skips EnumType.__call__ per row
+_ALGO_BY_VAL: dict[int, Algo] = {a.value: a for a in Algo}
+
+
+def _algo_from_value(value: int) -> Algo:
+    """Return the Algo stored as value, raising ValueError like Algo(value)."""
+    try:
+        return _ALGO_BY_VAL[value]
+    except KeyError:
+        raise ValueError(f"{value!r} is not a valid Algo") from None
+
+
+# Rows handed to a single executemany call when inserting file entries
+_FILE_ENTRY_BATCH_SIZE = 10_000
+
+_T = TypeVar("_T")
+
+
+def _chunked(
+    iterable: collections.abc.Iterable[_T], n: int
+) -> collections.abc.Iterator[list[_T]]:
+    """Yield successive lists of at most n items from iterable."""
+    it = iter(iterable)
+    while chunk := list(itertools.islice(it, n)):
+        yield chunk
+
+
+# Type-specific columns (hash_enclosure, password, rar_scheme, rar_version, n_volumes)
+_TypeColumns = tuple[str | None, str | None, RarScheme | None, str | None, int | None]
+
+
+def _hash_name_columns(arch: HashArchive) -> _TypeColumns:
+    return (cast(HashNameArchive, arch).enc.value, None, None, None, None)
+
+
+def _rar_columns(arch: HashArchive) -> _TypeColumns:
+    rar = cast(RarArchive, arch)
+    return (
+        None,
+        rar.password,
+        rar.scheme,
+        rar.version,
+        rar.n_volumes,
+    )
+
+
+def _sfv_columns(arch: HashArchive) -> _TypeColumns:
+    return (None, None, None, None, None)
+
+
+# Keyed by the same class names _fill_archive stores in hash_archives.type;
+# subclasses are matched through their nearest listed base class
+_ARCHIVE_ROW_BUILDERS: dict[
+    str, collections.abc.Callable[[HashArchive], _TypeColumns]
+] = {
+    HashNameArchive.__name__: _hash_name_columns,
+    RarArchive.__name__: _rar_columns,
+    SfvArchive.__name__: _sfv_columns,
+}
+
 
 class HashArchiveRepository:
     """Repository for any HashArchive subclass."""
@@ -18,48 +136,27 @@ class HashArchiveRepository:
         storage_path_str = str(archive.storage_path.resolve())
 
         archive_row = self._build_archive_row(archive)
-        archive_path_str = str(archive_row["path"])
 
         cur = con.cursor()
 
-        # Delete existing archive with same storage_path and path using subquery
-        _ = cur.execute(
-            """
-            DELETE FROM hash_archives
-            WHERE storage_path_id = (SELECT id FROM storage_paths WHERE storage_path = ?)
-              AND path = ?;
-            """,
-            (storage_path_str, archive_path_str),
+        archive_id = cast(
+            int,
+            cur.execute(
+                _UPSERT_ARCHIVE_SQL, archive_row + (storage_path_str,)
+            ).fetchone()[0],
         )
 
-        _ = cur.execute(
-            f"""
-            INSERT INTO hash_archives ({', '.join(archive_row.keys())}, storage_path_id)
-            SELECT {', '.join([':' + k + ' AS ' + k for k in archive_row.keys()])},
-            (SELECT id FROM storage_paths WHERE storage_path = :storage_path)
-            """,
-            archive_row | {"storage_path": storage_path_str},
-        )
+        # file_entries has no natural key, so replace them wholesale for this archive
+        _ = cur.execute("DELETE FROM file_entries WHERE archive_id = ?;", (archive_id,))
 
         if archive.files:
-            fe_rows = list(
-                self._build_fileentry_rows(
-                    archive.files,
-                    storage_path=storage_path_str,
-                    archive_path=archive_path_str,
-                )
-            )
-            _ = cur.executemany(
-                """
-                INSERT INTO file_entries (path, size, is_dir, hash_value, algo, archive_id)
-                SELECT :path AS path, :size AS size, :is_dir AS is_dir, :hash_value AS hash_value,
-                :algo AS algo, hash_archives.id as archive_id
-                FROM hash_archives
-                JOIN storage_paths ON hash_archives.storage_path_id = storage_paths.id
-                WHERE storage_paths.storage_path = :storage_path AND hash_archives.path = :archive_path
-                """,
-                fe_rows,
-            )
+            # The archive id is bound directly, so no per-row lookup of the parent;
+            # rows are streamed in batches to keep memory bounded for huge archives
+            for batch in _chunked(
+                self._build_fileentry_rows(archive.files.values(), archive_id),
+                _FILE_ENTRY_BATCH_SIZE,
+            ):
+                _ = cur.executemany(_FE_INSERT_SQL, batch)
 
     def load(
         self, storage_path: Path, path: PurePath | str, con: sqlite3.Connection
@@ -68,44 +165,34 @@ class HashArchiveRepository:
         storage_path_str = str(storage_path.resolve())
         path_str = str(path)
 
-        con.row_factory = sqlite3.Row
+        # Plain tuples on this cursor only; sqlite3.Row lookups by name are
+        # noticeably slower in the per-file loop
         cur = con.cursor()
+        cur.row_factory = None
 
-        # Get archive with storage_path using JOIN
-        arc_row = cast(
-            None | sqlite3.Row,
-            cur.execute(
-                """
-                SELECT hash_archives.*, storage_paths.storage_path
-                FROM hash_archives
-                JOIN storage_paths ON hash_archives.storage_path_id = storage_paths.id
-                WHERE storage_paths.storage_path = ? AND hash_archives.path = ?;
-                """,
-                (storage_path_str, path_str),
-            ).fetchone(),
-        )
-
-        if arc_row is None:
+        # Archive row and its file entries in one round-trip; an archive without
+        # files still yields one row with NULL file entry columns
+        _ = cur.execute(_LOAD_ARCHIVE_SQL, (storage_path_str, path_str))
+        first = cast(tuple[Any, ...] | None, cur.fetchone())
+        if first is None:
             raise FileNotFoundError(f"Archive not found: {storage_path_str}/{path_str}")
 
-        archive = self._fill_archive(arc_row)
-
-        fe_rows = cast(
-            list[sqlite3.Row],
-            cur.execute(
-                "SELECT * FROM file_entries WHERE archive_id = ?;", (arc_row["id"],)
-            ).fetchall(),
-        )
-
+        archive = self._fill_archive(dict(zip(_LOAD_ARCHIVE_KEYS, first)))
+        n_keys = len(_LOAD_ARCHIVE_KEYS)
+        fe_rows = (row[n_keys:] for row in itertools.chain((first,), cur))
         archive.files = {
-            FileEntry(
-                path=PurePath(cast(str, r["path"])),
-                size=cast(int | None, r["size"]),
-                is_dir=bool(cast(int, r["is_dir"])),
-                hash_value=cast(bytes | None, r["hash_value"]),
-                algo=Algo(r["algo"]) if r["algo"] is not None else None,
+            fe.str_path: fe
+            for fe in (
+                FileEntry.from_path_str(
+                    p,
+                    s,
+                    bool(d),
+                    h,
+                    _algo_from_value(a) if a is not None else None,
+                )
+                for p, s, d, h, a in fe_rows
+                if p is not None
             )
-            for r in fe_rows
         }
         return archive
 
@@ -113,8 +200,8 @@ class HashArchiveRepository:
         self, archive_id: int, con: sqlite3.Connection
     ) -> HashArchive | None:
         """Load an archive by its primary key."""
-        con.row_factory = sqlite3.Row
         cur = con.cursor()
+        cur.row_factory = sqlite3.Row
         arc_row = cast(
             None | sqlite3.Row,
             cur.execute(
@@ -131,56 +218,40 @@ class HashArchiveRepository:
             return None
         return self._fill_archive(arc_row)
 
-    def _build_archive_row(self, arch: HashArchive) -> dict[str, str | int | None]:
-        """Return a dict used directly with named-parameter SQL."""
-        base: dict[str, str | int | None] = {
-            "type": type(arch).__name__,
-            "path": str(arch.path),
-            "is_deleted": int(arch.is_deleted),
-            "hash_enclosure": None,
-            "password": None,
-            "rar_scheme": None,
-            "rar_version": None,
-            "n_volumes": None,
-        }
-        if isinstance(arch, HashNameArchive):
-            base["hash_enclosure"] = arch.enc.value
-        elif isinstance(arch, RarArchive):
-            base.update(
-                password=arch.password,
-                rar_scheme=arch.scheme.value if arch.scheme else None,
-                rar_version=arch.version,
-                n_volumes=arch.n_volumes,
-            )
-        elif isinstance(arch, SfvArchive):
-            pass
+    def _build_archive_row(self, arch: HashArchive) -> tuple[str | int | None, ...]:
+        """Return the archive's values in _ARCHIVE_COLUMNS order."""
+        for cls in type(arch).__mro__:
+            builder = _ARCHIVE_ROW_BUILDERS.get(cls.__name__)
+            if builder is not None:
+                break
         else:
             raise TypeError(f"Unsupported HashArchive subclass: {type(arch).__name__}")
-        return base
+        return (
+            type(arch).__name__,
+            str(arch.path),
+            int(arch.is_deleted),
+        ) + builder(arch)
 
     @staticmethod
     def _build_fileentry_rows(
         entries: collections.abc.Iterable[FileEntry],
-        storage_path: str | None = None,
-        archive_path: str | Path | None = None,
-    ) -> collections.abc.Iterable[dict[str, str | int | None | bytes]]:
+        archive_id: int,
+    ) -> collections.abc.Iterator[
+        tuple[str, int | None, bool, bytes | None, Algo | None, int]
+    ]:
+        """Yield positional file_entries rows in _FE_COLS order.
+
+        bool and the IntEnum Algo are int subclasses, which sqlite3 binds as INTEGER
+        natively, so they are passed through without per-row coercion.
+        """
         for fe in entries:
-            ret_dict: dict[str, str | int | None | bytes] = {
-                "path": str(fe.path),
-                "size": fe.size,
-                "is_dir": int(fe.is_dir),
-                "hash_value": fe.hash_value,
-                "algo": fe.algo.value if fe.algo is not None else None,
-            }
-            if storage_path:
-                ret_dict["storage_path"] = storage_path
-            if archive_path:
-                ret_dict.update(archive_path=str(archive_path))
-            yield ret_dict
+            yield (fe.str_path, fe.size, fe.is_dir, fe.hash_value, fe.algo, archive_id)
 
     @staticmethod
-    def _fill_archive(row: sqlite3.Row) -> HashArchive:
-        """Create a HashArchive from a database row.
+    def _fill_archive(
+        row: sqlite3.Row | collections.abc.Mapping[str, Any],
+    ) -> HashArchive:
+        """Create a HashArchive from a database row or an equivalent mapping.
 
         The row must include storage_paths.storage_path from a JOIN.
         """
@@ -210,7 +281,7 @@ class HashArchiveRepository:
                 n_volumes=cast(int | None, row["n_volumes"]),
             )
         elif archive_type == "SfvArchive":
-            arch = SfvArchive(storage_path, PurePath(archive_path), files=set())
+            arch = SfvArchive(storage_path, PurePath(archive_path), files=None)
         else:
             raise ValueError(f"Unknown archive type in database: {archive_type}")
 
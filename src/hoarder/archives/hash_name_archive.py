@@ -1,10 +1,11 @@
 """This module contains the HashNameArchive class, which represents a file with a hash in its name."""
 
+import collections.abc
 import enum
 import logging
 import os
 import pathlib
-import re
+import string
 import typing
 
 from .hash_archive import Algo, FileEntry, HashArchive
@@ -19,8 +20,6 @@ logger = logging.getLogger("hoarder.archives.hash_name_file")
 
 T = typing.TypeVar("T", bound="HashNameArchive")
 
-# CRC32 regex in filenames
-
 
 class HashEnclosure(enum.Enum):
     """Enumeration of how a hash is stored in a file name."""
@@ -29,24 +28,38 @@ class HashEnclosure(enum.Enum):
     PAREN = "()"
 
 
+# Opening and closing character of each enclosure, e.g. "[]", mapped to the enclosure
+_ENCLOSURE_BY_CHARS: dict[str, HashEnclosure] = {
+    enc.value: enc for enc in HashEnclosure
+}
+_HEX_DIGITS = frozenset(string.hexdigits)
+# Length of an enclosed CRC32 tag such as "[0A1B2C3D]"
+_TAG_LEN = 10
+# Hash names only ever carry CRC32, resolve the enum member once
+_ALGO_CRC32 = Algo.CRC32
+
+
+def _parse_hash_tag(name: str) -> tuple[HashEnclosure, bytes] | None:
+    """Find the hash tag that sits right before a suffix in a file name.
+
+    Tries every dot from the right, so the last tag followed by a suffix wins, and
+    requires a non-empty stem in front of the tag. Returns None if there is no tag.
+    """
+    dot = name.rfind(".")
+    while dot > _TAG_LEN:
+        enc = _ENCLOSURE_BY_CHARS.get(name[dot - _TAG_LEN] + name[dot - 1])
+        if enc is not None and dot < len(name) - 1:
+            crc_hex = name[dot - _TAG_LEN + 1 : dot - 1]
+            if _HEX_DIGITS.issuperset(crc_hex):
+                return enc, bytes.fromhex(crc_hex)
+        dot = name.rfind(".", 0, dot)
+    return None
+
+
 class HashNameArchive(HashArchive):
     """This class contains information about a file that has a hash in its name."""
 
-    # Regular expressions to match hash in file names
-    # are now precompiled with re.IGNORECASE
-    _regexes: dict[HashEnclosure, re.Pattern[str]] = {
-        enc: re.compile(
-            rf"""(?x)
-                    ^(?P<stem>.+)
-                    {re.escape(enc.value[0])}
-                    (?P<crc>[0-9A-F]{{8}})
-                    {re.escape(enc.value[1])}
-                    (?P<suffix>\..+)$
-                    """,
-            re.IGNORECASE,
-        )
-        for enc in HashEnclosure
-    }
+    __slots__ = ("enc",)
 
     enc: HashEnclosure
 
@@ -56,17 +69,18 @@ class HashNameArchive(HashArchive):
         self,
         storage_path: pathlib.Path,
         path: pathlib.PurePath,
-        files: set[FileEntry] | None = None,
+        files: collections.abc.Collection[FileEntry] | None = None,
         enc: HashEnclosure = HashEnclosure.SQUARE,
     ) -> None:
         if files is not None:
             if len(files) != 1:
                 raise ValueError("HashNameArchive must have exactly one file entry.")
-            if next(iter(files)).is_dir:
+            (only_entry,) = files
+            if only_entry.is_dir:
                 raise ValueError("HashNameArchive cannot have a directory entry.")
-            if next(iter(files)).path.name != path.name:
+            if only_entry.path.name != path.name:
                 raise ValueError(
-                    f"HashNameArchive path {path} does not match file entry {next(iter(files)).path}"
+                    f"HashNameArchive path {path} does not match file entry {only_entry.path}"
                 )
         super().__init__(storage_path, path, files)
         self.enc = enc
@@ -86,16 +100,10 @@ class HashNameArchive(HashArchive):
         if not full_path.is_file():
             raise FileNotFoundError(f"File not found: {full_path}")
         logger.debug("Reading %s", full_path)
-        crc = None
-        algo = None
-        for enc in HashEnclosure:
-            match = cls._regexes[enc].match(path.name)
-            if match:
-                crc = bytes.fromhex(match.group("crc"))
-                algo = Algo.CRC32
-                break
-        else:
+        parsed = _parse_hash_tag(path.name)
+        if parsed is None:
             raise ValueError(f"Could not extract hash from {path}")
+        enc, crc = parsed
 
         file_size = os.path.getsize(full_path)
 
@@ -105,7 +113,7 @@ class HashNameArchive(HashArchive):
                 file_size,
                 False,
                 crc,
-                algo,
+                _ALGO_CRC32,
             )
         }
 
@@ -1,11 +1,20 @@
 """This module contains the RarArchive class, which holds information about a RAR file"""
 
+import collections
+import collections.abc
+import concurrent.futures
+import hmac
+import io
 import logging
 import os
 import pathlib
 import re
+import shutil
 import subprocess
+import tempfile
+import threading
 import typing
+import zlib
 
 from ..utils import SEVENZIP
 from .hash_archive import Algo, FileEntry, HashArchive
@@ -20,10 +29,36 @@ logger = logging.getLogger("hoarder.archives.rar_file")
 
 T = typing.TypeVar("T", bound="RarArchive")
 
+# Blocks of 7z's technical listing (-slt) are separated by an empty line
+_SLT_BLOCK_SEP = re.compile(rb"\r?\n\r?\n")
+# One "Key = Value" line; like str.split("=", 1), the key ends at the first "="
+_SLT_KEY_VALUE = re.compile(rb"^([^=\r\n]*)=([^\r\n]*)", re.MULTILINE)
+# Size of the reads from a 7z stdout pipe
+_PIPE_READ_SIZE = 2**16
+# Upper bound on concurrent 7z processes when hashing files one at a time
+_CRC32_SLOW_MAX_WORKERS = 8
+# The batched CRC32 run extracts into the temp dir, often a small tmpfs; it only
+# pays off for many files, and only while their total stays well under the cap
+_CRC32_BATCH_MIN_ENTRIES = 8
+_CRC32_BATCH_MAX_BYTES = 256 * 2**20
+# Listings of up to this many archives are kept, least recently used first out
+_LIST_CACHE_SIZE = 512
+# Cache keys carry a keyed digest of the password rather than the password itself
+_LIST_CACHE_HMAC_KEY = os.urandom(32)
+_ListKey = tuple[str, tuple[tuple[int, int], ...], bytes | None]
+_list_cache: collections.OrderedDict[
+    _ListKey, tuple[tuple[tuple[str, str], ...], ...]
+] = collections.OrderedDict()
+_list_cache_lock = threading.Lock()
+# The "CRC32  for data:  <hex>" line of 7z t -scrc
+_CRC32_DATA_LINE = re.compile(rb"CRC32[^\n]*data[^\n]*?([A-F0-9]{8})")
+
 
 class RarArchive(HashArchive):
     """This class contains information about a RAR file."""
 
+    __slots__ = ("password", "scheme", "version", "n_volumes")
+
     password: str | None
     scheme: RarScheme | None
     version: str | None
@@ -33,7 +68,7 @@ class RarArchive(HashArchive):
         self,
         storage_path: pathlib.Path,
         path: pathlib.PurePath,
-        files: set[FileEntry] | None = None,
+        files: collections.abc.Iterable[FileEntry] | None = None,
         password: str | None = None,
         version: str | None = None,
         scheme: RarScheme | None = None,
@@ -64,8 +99,11 @@ class RarArchive(HashArchive):
                 self.storage_path / f"{stem}.part{index}.rar"
                 for index in range(1, self.n_volumes + 1)
             ]
+            # One directory listing instead of a stat per volume
+            with os.scandir(self.storage_path) as it:
+                names = {entry.name for entry in it}
             for p in volume_list:
-                if not p.exists():
+                if p.name not in names:
                     raise FileNotFoundError(f"Volume {p} not found")
             return volume_list
         raise ValueError(
@@ -155,7 +193,7 @@ class RarArchive(HashArchive):
             logger.debug("Path %s is not a file or directory", full_path)
             raise FileNotFoundError(f"{full_path} could not be found")
 
-        infos = RarArchive.list_rar(main_volume, password)
+        infos = RarArchive.list_rar(main_volume, password, rar_volumes)
         type_entries = [entry for entry in infos if "Type" in entry]
 
         if not type_entries or len(type_entries) > 1:
@@ -191,9 +229,50 @@ class RarArchive(HashArchive):
 
     @classmethod
     def list_rar(
-        cls, path: pathlib.Path, password: str | None = None
+        cls,
+        path: pathlib.Path,
+        password: str | None = None,
+        volumes: collections.abc.Sequence[pathlib.Path] | None = None,
+    ) -> list[dict[str, str]]:
+        """Get an info list about this archive and its contents.
+
+        Listings are cached by path, password and the modification time and size of
+        every volume, so an unchanged archive is only listed by 7z once per process.
+        The cache keeps neither the password itself nor the dicts handed out.
+
+        Args:
+            path: The main volume.
+            password: Optional password for encrypted archives.
+            volumes: All volumes of the archive; defaults to just the main volume.
+        """
+        volume_stats = tuple(
+            (stat.st_mtime_ns, stat.st_size)
+            for stat in (volume.stat() for volume in (volumes or [path]))
+        )
+        password_key = (
+            None
+            if password is None
+            else hmac.digest(_LIST_CACHE_HMAC_KEY, password.encode(), "sha256")
+        )
+        key = (str(path), volume_stats, password_key)
+        with _list_cache_lock:
+            listing = _list_cache.get(key)
+            if listing is not None:
+                _list_cache.move_to_end(key)
+        if listing is None:
+            listing = tuple(
+                tuple(entry.items()) for entry in cls._list_rar_uncached(path, password)
+            )
+            with _list_cache_lock:
+                _list_cache[key] = listing
+                if len(_list_cache) > _LIST_CACHE_SIZE:
+                    _ = _list_cache.popitem(last=False)
+        return [dict(entry) for entry in listing]
+
+    @staticmethod
+    def _list_rar_uncached(
+        path: pathlib.Path, password: str | None
     ) -> list[dict[str, str]]:
-        """Get an info list about this archive and its contents."""
         logger.debug(
             "Listing %(name)s, using password %(password)s",
             {"name": path.name, "password": password},
@@ -209,19 +288,18 @@ class RarArchive(HashArchive):
             str(path),
         ]
 
-        sub = subprocess.run(command_line, capture_output=True, check=True)
-
-        entries = sub.stdout.decode(errors="ignore", encoding="utf-8").split(
-            2 * os.linesep
-        )
-        ret: list[dict[str, str]] = []
-
-        for entry in entries:
-            lines = entry.splitlines()
-            kv_pairs = [line.split("=", 1) for line in lines if "=" in line]
-            entry_dict = {k.strip(): v.strip() for k, v in kv_pairs if k.strip()}
-            if entry_dict:
-                ret.append(entry_dict)
+        # Blocks are parsed as 7z writes them instead of after it has finished;
+        # stderr goes to a file so a chatty 7z cannot block on a full pipe
+        with tempfile.TemporaryFile() as stderr, subprocess.Popen(
+            command_line, stdout=subprocess.PIPE, stderr=stderr
+        ) as proc:
+            ret = _read_slt_listing(typing.cast(io.BufferedReader, proc.stdout))
+            _ = proc.wait()
+            if proc.returncode:
+                _ = stderr.seek(0)
+                raise subprocess.CalledProcessError(
+                    proc.returncode, command_line, stderr=stderr.read()
+                )
 
         logger.debug(
             "Found %(count)d files in %(name)s",
@@ -257,47 +335,108 @@ class RarArchive(HashArchive):
 
         sub = subprocess.run(command_line, capture_output=True, check=True)
 
-        lines = sub.stdout.decode(errors="ignore", encoding="utf-8").splitlines()
-
-        crc_match = next(
-            (
-                m.group(1)
-                for line in lines
-                if (m := re.match(r".*CRC32.*data.*([A-F0-9]{8}).*", line))
-            ),
-            None,
-        )
+        crc_line = _CRC32_DATA_LINE.search(sub.stdout)
 
-        if not crc_match:
+        if not crc_line:
             logger.error(
                 "Failed to get CRC for %(name)s: %(entry_path)s",
                 {"name": self.path.name, "entry_path": entry_path},
             )
             return None
+        crc_hex = crc_line[1].decode("ascii")
         logger.debug(
             "Got CRC %(crc_match)s for %(name)s: %(entry_path)s",
-            {"crc_match": crc_match, "name": self.path.name, "entry_path": entry_path},
+            {"crc_match": crc_hex, "name": self.path.name, "entry_path": entry_path},
         )
-        return bytes.fromhex(crc_match)
+        return bytes.fromhex(crc_hex)
 
     @property
     def hash_values_exist(self) -> bool:
         """Check if *all* files already have hash values."""
         return all(file.hash_value for file in self if not file.is_dir)
 
+    def get_crc32_batch(
+        self, entry_paths: collections.abc.Iterable[pathlib.PurePath]
+    ) -> dict[str, bytes]:
+        """Compute the CRC32 of several files in the archive with a single 7z run.
+
+        The files are extracted together into a temporary directory and hashed there,
+        instead of spawning one 7z test per file as get_crc32_slow does.
+
+        Returns:
+            A mapping from each entry path string to its big-endian CRC32.
+        """
+        path_list = list(entry_paths)
+        crcs: dict[str, bytes] = {}
+        with tempfile.TemporaryDirectory() as extract_dir:
+            extract_path = pathlib.Path(extract_dir)
+            self.extract_files(path_list, extract_path)
+            for entry_path in path_list:
+                crc = 0
+                with open(extract_path / entry_path, "rb") as f:
+                    while chunk := f.read(2**16):
+                        crc = zlib.crc32(chunk, crc)
+                crcs[str(entry_path)] = crc.to_bytes(4, "big")
+        return crcs
+
     def update_hash_values(self):
         """Update the hash values of all files in the archive.
-        This will always use the slow method."""
+        This will always use the slow method, batched into one 7z run where possible."""
         logger.debug("Updating hash values for %(name)s", {"name": self.full_path.name})
-        for entry in self:
-            if not entry.hash_value:
+        missing = [entry for entry in self if not entry.hash_value]
+        to_hash = [entry for entry in missing if not entry.is_dir]
+        crcs: dict[str, bytes] = {}
+        # The batch extracts everything into the temp dir, so only a large number
+        # of small files is batched, and only with twice its size still free there;
+        # anything else is tested one file at a time without touching the disk
+        extract_size = sum(entry.size or 0 for entry in to_hash)
+        if (
+            len(to_hash) < _CRC32_BATCH_MIN_ENTRIES
+            or extract_size > _CRC32_BATCH_MAX_BYTES
+            or 2 * extract_size > shutil.disk_usage(tempfile.gettempdir()).free
+        ):
+            logger.debug(
+                "Not batching %(count)d files (%(size)d bytes) of %(name)s, hashing "
+                "one file at a time",
+                {
+                    "count": len(to_hash),
+                    "size": extract_size,
+                    "name": self.full_path.name,
+                },
+            )
+        else:
+            try:
+                crcs = self.get_crc32_batch(entry.path for entry in to_hash)
+            except (subprocess.CalledProcessError, OSError):
+                logger.debug(
+                    "Batch CRC32 failed for %(name)s, falling back to one file at a "
+                    "time",
+                    {"name": self.full_path.name},
+                )
+        slow_entries: list[FileEntry] = []
+        for entry in missing:
+            if entry.str_path in crcs:
+                entry.hash_value = crcs[entry.str_path]
+                entry.algo = Algo.CRC32
+            elif entry.is_dir:
+                entry.hash_value = b"\x00" * 4
+                entry.algo = Algo.CRC32
+            else:
+                slow_entries.append(entry)
+        if not slow_entries:
+            return
+
+        # Each slow CRC is its own 7z process, so threads are enough to keep the
+        # cores busy; the cap keeps large archives from starting a flood of them
+        max_workers = min(os.cpu_count() or 1, _CRC32_SLOW_MAX_WORKERS)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(self.get_crc32_slow, entry.path)  # used for PART_N
+                for entry in slow_entries
+            ]
+            for entry, future in zip(slow_entries, futures):
                 try:
-                    if entry.is_dir:
-                        crc = b"\x00" * 4
-                    else:
-                        crc = self.get_crc32_slow(entry.path)  # used for PART_N, slow
-
-                    entry.hash_value = crc
+                    entry.hash_value = future.result()
                     entry.algo = Algo.CRC32
                 except subprocess.CalledProcessError:
                     logger.error(
@@ -306,8 +445,7 @@ class RarArchive(HashArchive):
                     )
 
     def read_file(self, path: pathlib.PurePath) -> bytes:
-        paths: set[pathlib.PurePath] = set([file.path for file in self.files])
-        if path not in paths:
+        if str(path) not in self.files:
             raise FileNotFoundError(f"Could not find {path}")
 
         command_line: list[str] = [
@@ -323,3 +461,77 @@ class RarArchive(HashArchive):
 
         sub = subprocess.run(command_line, capture_output=True, check=True)
         return sub.stdout
+
+    def extract_files(
+        self,
+        paths: collections.abc.Iterable[pathlib.PurePath],
+        destination: pathlib.Path,
+    ) -> None:
+        """Extract several files into destination with a single 7z run.
+
+        Paths inside the archive are kept, so a file ends up at destination / path.
+        Solid archives are decompressed once instead of once per file.
+        """
+        path_strs = [str(path) for path in paths]
+        for path_str in path_strs:
+            if path_str not in self.files:
+                raise FileNotFoundError(f"Could not find {path_str}")
+        if not path_strs:
+            return
+
+        # A list file keeps long member lists clear of command line length limits
+        with tempfile.TemporaryDirectory() as list_dir:
+            list_file = pathlib.Path(list_dir) / "files.txt"
+            _ = list_file.write_text("\n".join(path_strs), encoding="utf-8")
+            command_line: list[str] = [
+                str(SEVENZIP),
+                "x",
+                "-y",
+                "-o" + str(destination),
+                "-scsUTF-8",
+                "-sccUTF-8",
+                "-p" + (self.password if self.password else ""),
+                str(self.full_path),
+                "@" + str(list_file),
+            ]
+            _ = subprocess.run(command_line, capture_output=True, check=True)
+
+
+def _parse_slt_listing(stdout: bytes) -> list[dict[str, str]]:
+    """Parse the output of 7z l -slt into one dict per block of key = value lines.
+
+    The bytes are scanned in place, only keys and values are decoded, and blocks
+    without any key = value line are left out.
+    """
+    ret: list[dict[str, str]] = []
+    start = 0
+    while True:
+        sep = _SLT_BLOCK_SEP.search(stdout, start)
+        end = sep.start() if sep else len(stdout)
+        entry_dict: dict[str, str] = {}
+        for m in _SLT_KEY_VALUE.finditer(stdout, start, end):
+            key = m[1].decode("utf-8", "ignore").strip()
+            if key:
+                entry_dict[key] = m[2].decode("utf-8", "ignore").strip()
+        if entry_dict:
+            ret.append(entry_dict)
+        if sep is None:
+            return ret
+        start = sep.end()
+
+
+def _read_slt_listing(stream: io.BufferedReader) -> list[dict[str, str]]:
+    """Parse 7z l -slt output from a pipe, one batch of complete blocks per read."""
+    ret: list[dict[str, str]] = []
+    pending = b""
+    while chunk := stream.read1(_PIPE_READ_SIZE):
+        data = pending + chunk
+        # Everything up to the last empty line holds only complete blocks
+        last_sep = max(data.rfind(b"\n\n"), data.rfind(b"\n\r\n"))
+        if last_sep < 0:
+            pending = data
+            continue
+        ret.extend(_parse_slt_listing(data[: last_sep + 1]))
+        pending = data[last_sep + 1 :]
+    ret.extend(_parse_slt_listing(pending))
+    return ret
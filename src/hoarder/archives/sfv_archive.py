@@ -16,6 +16,8 @@ T = typing.TypeVar("T", bound="SfvArchive")
 class SfvArchive(HashArchive):
     """This class contains information about a SFV file."""
 
+    __slots__ = ()
+
     @classmethod
     def _from_path(
         cls: typing.Type[T], storage_path: pathlib.Path, path: pathlib.PurePath
@@ -57,11 +59,12 @@ class SfvArchive(HashArchive):
                         )
 
                     entry_path: pathlib.PurePath
-                    if determine_path_type(entry_path_str) == PathType.WINDOWS:
+                    path_type = determine_path_type(entry_path_str)
+                    if path_type == PathType.WINDOWS:
                         entry_path = pathlib.PurePath(
                             pathlib.PureWindowsPath(entry_path_str).as_posix()
                         )
-                    elif determine_path_type(entry_path_str) == PathType.UNRESOLVABLE:
+                    elif path_type == PathType.UNRESOLVABLE:
                         raise ValueError(
                             f"Could not determine path type of {entry_path_str}"
                         )
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import collections.abc
 import datetime as dt
+import json
 import sqlite3
 from pathlib import Path, PurePath
 
 from ..archives import HashArchive, HashArchiveRepository
+from ..utils import parse_iso_datetime
 from .download import Download
 from .real_file import RealFile
 from .real_file_repository import RealFileRepository
@@ -32,15 +34,15 @@ class DownloadRepository:
 
     def save(self, download: Download, con: sqlite3.Connection) -> None:
         """Insert or replace a Download and its associated RealFiles and HashArchives."""
-        # Ensure storage paths exist for all real_files
-        for real_file in download.real_files:
-            self._ensure_storage_path(con, real_file.storage_path)
-            for verification in real_file.verification:
-                self._ensure_storage_path(con, verification.source_storage_path)
+        # One cursor serves every statement issued directly by this method
+        cur = con.cursor()
 
-        # Ensure storage paths exist for all hash_archives
-        for hash_archive in download.hash_archives:
-            self._ensure_storage_path(con, hash_archive.storage_path)
+        # Resolve and stringify each distinct storage path once for this save
+        storage_path_strs = self._resolve_storage_paths(download)
+
+        # Ensure storage paths exist for all real_files, verifications and hash_archives
+        for storage_path_str in storage_path_strs.values():
+            self._ensure_storage_path(cur, storage_path_str)
 
         # Save all real_files first using real_file_repository
         for real_file in download.real_files:
@@ -50,16 +52,9 @@ class DownloadRepository:
         for hash_archive in download.hash_archives:
             self.hash_archive_repo.save(hash_archive, con)
 
-        # Save or update the download record
-        cur = con.cursor()
-        _ = cur.execute(
-            """
-            DELETE FROM downloads
-            WHERE title = ?;
-            """,
-            (download.title,),
-        )
-        _ = cur.execute(
+        # Upsert the download record; keeping its id intact means the association
+        # rows below survive a re-save instead of being cascaded away
+        download_id = cur.execute(
             """
             INSERT INTO downloads (
                 title,
@@ -74,7 +69,13 @@ class DownloadRepository:
                 :last_seen,
                 :comment,
                 :processed
-            );
+            )
+            ON CONFLICT(title) DO UPDATE SET
+                first_seen = excluded.first_seen,
+                last_seen = excluded.last_seen,
+                comment = excluded.comment,
+                processed = excluded.processed
+            RETURNING id;
             """,
             {
                 "title": download.title,
@@ -83,177 +84,185 @@ class DownloadRepository:
                 "comment": download.comment,
                 "processed": int(download.processed),
             },
-        )
+        ).fetchone()[0]
 
-        # Delete existing associations using SQL
-        _ = cur.execute(
+        # Associate real_files and hash_archives, touching only changed rows
+        real_file_ids = self._resolve_ids(
+            cur,
             """
-            DELETE FROM download_real_files
-            WHERE download_id = (
-                SELECT downloads.id
-                FROM downloads
-                WHERE downloads.title = ?
-            );
+            SELECT real_files.id
+            FROM json_each(?) AS wanted
+            JOIN storage_paths
+              ON storage_paths.storage_path = json_extract(wanted.value, '$[0]')
+            JOIN real_files
+              ON real_files.storage_path_id = storage_paths.id
+             AND real_files.path = json_extract(wanted.value, '$[1]')
+            ORDER BY wanted.key;
             """,
-            (download.title,),
+            self._build_association_rows(download.real_files, storage_path_strs),
         )
-        _ = cur.execute(
+        if len(real_file_ids) != len(download.real_files):
+            raise ValueError("Failed to insert download-real_file associations")
+        self._sync_associations(
+            cur, "download_real_files", "real_file_id", download_id, real_file_ids
+        )
+
+        hash_archive_ids = self._resolve_ids(
+            cur,
             """
-            DELETE FROM download_hash_archives
-            WHERE download_id = (
-                SELECT downloads.id
-                FROM downloads
-                WHERE downloads.title = ?
-            );
+            SELECT hash_archives.id
+            FROM json_each(?) AS wanted
+            JOIN storage_paths
+              ON storage_paths.storage_path = json_extract(wanted.value, '$[0]')
+            JOIN hash_archives
+              ON hash_archives.storage_path_id = storage_paths.id
+             AND hash_archives.path = json_extract(wanted.value, '$[1]')
+            ORDER BY wanted.key;
             """,
-            (download.title,),
+            self._build_archive_association_rows(
+                download.hash_archives, storage_path_strs
+            ),
+        )
+        if len(hash_archive_ids) != len(download.hash_archives):
+            raise ValueError("Failed to insert download-hash_archive associations")
+        self._sync_associations(
+            cur,
+            "download_hash_archives",
+            "hash_archive_id",
+            download_id,
+            hash_archive_ids,
         )
-
-        # Create associations between download and real_files using SQL
-        if download.real_files:
-            association_rows = list(
-                self._build_association_rows(download.real_files, download.title)
-            )
-            if association_rows:
-                expected_rows = len(association_rows)
-                _ = cur.executemany(
-                    """
-                    INSERT OR IGNORE INTO download_real_files (
-                        download_id,
-                        real_file_id
-                    )
-                    SELECT
-                        (
-                            SELECT downloads.id
-                            FROM downloads
-                            WHERE downloads.title = :download_title
-                        ) AS download_id,
-                        (
-                            SELECT real_files.id
-                            FROM real_files
-                            JOIN storage_paths ON real_files.storage_path_id = storage_paths.id
-                            WHERE storage_paths.storage_path = :real_file_storage_path
-                              AND real_files.path = :real_file_path
-                        ) AS real_file_id;
-                    """,
-                    association_rows,
-                )
-                if cur.rowcount != expected_rows:
-                    raise ValueError("Failed to insert download-real_file associations")
-
-        # Create associations between download and hash_archives using SQL
-        if download.hash_archives:
-            archive_association_rows = list(
-                self._build_archive_association_rows(
-                    download.hash_archives, download.title
-                )
-            )
-            if archive_association_rows:
-                expected_rows = len(archive_association_rows)
-                _ = cur.executemany(
-                    """
-                    INSERT OR IGNORE INTO download_hash_archives (
-                        download_id,
-                        hash_archive_id
-                    )
-                    SELECT
-                        (
-                            SELECT downloads.id
-                            FROM downloads
-                            WHERE downloads.title = :download_title
-                        ) AS download_id,
-                        (
-                            SELECT hash_archives.id
-                            FROM hash_archives
-                            JOIN storage_paths ON hash_archives.storage_path_id = storage_paths.id
-                            WHERE storage_paths.storage_path = :archive_storage_path
-                              AND hash_archives.path = :archive_path
-                        ) AS hash_archive_id;
-                    """,
-                    archive_association_rows,
-                )
-                if cur.rowcount != expected_rows:
-                    raise ValueError(
-                        "Failed to insert download-hash_archive associations"
-                    )
 
     def load(self, title: str, con: sqlite3.Connection) -> Download:
         """Load one Download (including all associated RealFile and HashArchive records)."""
-        con.row_factory = sqlite3.Row
+        # Row factories go on the cursor; the connection is shared across calls
         cur = con.cursor()
-        download_row = cur.execute(
+        cur.row_factory = sqlite3.Row
+        # Download, real files and verifications come back in one LEFT JOIN;
+        # real file columns keep their own names so _row_to_real_file applies as-is
+        rows = cur.execute(
             """
-            SELECT downloads.*
+            SELECT downloads.id AS download_id,
+                   downloads.title AS download_title,
+                   downloads.first_seen AS download_first_seen,
+                   downloads.last_seen AS download_last_seen,
+                   downloads.comment AS download_comment,
+                   downloads.processed AS download_processed,
+                   real_files.*,
+                   rf_storage_paths.storage_path,
+                   verifications.id AS verification_id,
+                   verifications.source_type AS verification_source_type,
+                   verifications.source_path AS verification_source_path,
+                   v_storage_paths.storage_path AS verification_source_storage_path,
+                   verifications.hash_value AS verification_hash_value,
+                   verifications.algo AS verification_algo,
+                   verifications.comment AS verification_comment
             FROM downloads
-            WHERE downloads.title = ?;
+            LEFT JOIN download_real_files
+              ON download_real_files.download_id = downloads.id
+            LEFT JOIN real_files
+              ON real_files.id = download_real_files.real_file_id
+            LEFT JOIN storage_paths AS rf_storage_paths
+              ON rf_storage_paths.id = real_files.storage_path_id
+            LEFT JOIN verifications
+              ON verifications.real_file_id = real_files.id
+            LEFT JOIN storage_paths AS v_storage_paths
+              ON v_storage_paths.id = verifications.source_storage_path_id
+            WHERE downloads.title = ?
+            ORDER BY real_files.id, verifications.id;
             """,
             (title,),
-        ).fetchone()
+        ).fetchall()
 
-        if download_row is None:
+        if not rows:
             raise FileNotFoundError(f"Download not found: {title}")
 
-        download = self._row_to_download(download_row)
-        real_files = self._load_real_files(con, download_row["id"])
-        download.real_files = real_files
-        hash_archives = self._load_hash_archives(con, download_row["id"])
-        download.hash_archives = hash_archives
+        download = self._row_to_download(rows[0])
+        download.real_files = self._group_real_files(rows)
+        download.hash_archives = self._load_hash_archives(con, rows[0]["download_id"])
         return download
 
     def _build_association_rows(
         self,
         real_files: list[RealFile],
-        download_title: str,
-    ) -> collections.abc.Iterator[dict[str, str]]:
-        """Build rows for inserting download-real_file associations."""
+        storage_path_strs: dict[Path, str],
+    ) -> collections.abc.Iterator[tuple[str, str]]:
+        """Build (storage_path, path) keys of a download's real_files."""
         for real_file in real_files:
-            yield {
-                "download_title": download_title,
-                "real_file_storage_path": str(real_file.storage_path.resolve()),
-                "real_file_path": str(real_file.path),
-            }
+            yield storage_path_strs[real_file.storage_path], str(real_file.path)
 
     def _build_archive_association_rows(
         self,
         hash_archives: list[HashArchive],
-        download_title: str,
-    ) -> collections.abc.Iterator[dict[str, str]]:
-        """Build rows for inserting download-hash_archive associations."""
+        storage_path_strs: dict[Path, str],
+    ) -> collections.abc.Iterator[tuple[str, str]]:
+        """Build (storage_path, path) keys of a download's hash_archives."""
         for hash_archive in hash_archives:
-            yield {
-                "download_title": download_title,
-                "archive_storage_path": str(hash_archive.storage_path.resolve()),
-                "archive_path": str(hash_archive.path),
-            }
+            yield storage_path_strs[hash_archive.storage_path], str(hash_archive.path)
 
-    def _load_real_files(
-        self,
-        con: sqlite3.Connection,
+    @staticmethod
+    def _resolve_ids(
+        cur: sqlite3.Cursor,
+        sql: str,
+        keys: collections.abc.Iterable[tuple[str, str]],
+    ) -> list[int]:
+        """Look up the primary key for each key in one query, in order.
+
+        The keys are passed as one JSON array that sql unpacks with json_each; keys
+        that match nothing are skipped.
+        """
+        return [row[0] for row in cur.execute(sql, (json.dumps(list(keys)),))]
+
+    @staticmethod
+    def _sync_associations(
+        cur: sqlite3.Cursor,
+        table: str,
+        column: str,
         download_id: int,
-    ) -> list[RealFile]:
-        """Load all RealFiles associated with a download."""
-        cursor = con.cursor()
-        real_file_rows = cursor.execute(
-            """
-            SELECT real_files.*, storage_paths.storage_path
-            FROM real_files
-            JOIN storage_paths ON real_files.storage_path_id = storage_paths.id
-            JOIN download_real_files ON real_files.id = download_real_files.real_file_id
-            WHERE download_real_files.download_id = ?
-            ORDER BY real_files.id;
+        ids: list[int],
+    ) -> None:
+        """Make the download's rows in an association table match ids exactly.
+
+        Stale associations are removed with a single targeted DELETE and the
+        remaining ones are inserted with ON CONFLICT DO NOTHING, so associations
+        that are already present are left untouched.
+        """
+        _ = cur.execute(
+            f"""
+            DELETE FROM {table}
+            WHERE download_id = ?
+              AND {column} NOT IN (SELECT value FROM json_each(?));
             """,
-            (download_id,),
-        ).fetchall()
+            (download_id, json.dumps(ids)),
+        )
+        _ = cur.executemany(
+            f"""
+            INSERT INTO {table} (download_id, {column})
+            VALUES (?, ?)
+            ON CONFLICT DO NOTHING;
+            """,
+            [(download_id, id_) for id_ in ids],
+        )
 
+    def _group_real_files(self, rows: list[sqlite3.Row]) -> list[RealFile]:
+        """Rebuild RealFiles and their verifications from the joined load rows."""
         real_files: list[RealFile] = []
-        for row in real_file_rows:
-            real_file = self.real_file_repo._row_to_real_file(row)
-            # Load verifications for each real_file
-            verifications = self.real_file_repo._load_verifications(
-                con, row["id"], real_file
-            )
-            real_file.verification = verifications
-            real_files.append(real_file)
+        current_id: int | None = None
+        real_file: RealFile | None = None
+        for row in rows:
+            if row["id"] is None:
+                # Download without any real files
+                continue
+            if row["id"] != current_id:
+                current_id = row["id"]
+                real_file = self.real_file_repo._row_to_real_file(row)
+                real_files.append(real_file)
+            if real_file is not None and row["verification_id"] is not None:
+                real_file.verification.append(
+                    self.real_file_repo._row_to_verification(
+                        row, real_file, prefix="verification_"
+                    )
+                )
         return real_files
 
     def _load_hash_archives(
@@ -263,6 +272,7 @@ class DownloadRepository:
     ) -> list[HashArchive]:
         """Load all HashArchives associated with a download."""
         cursor = con.cursor()
+        cursor.row_factory = sqlite3.Row
         archive_rows = cursor.execute(
             """
             SELECT hash_archives.*, storage_paths.storage_path
@@ -284,28 +294,37 @@ class DownloadRepository:
         return hash_archives
 
     @staticmethod
-    def _ensure_storage_path(con: sqlite3.Connection, storage_path: Path) -> None:
-        cur = con.cursor()
+    def _resolve_storage_paths(download: Download) -> dict[Path, str]:
+        """Map every storage path referenced by a download to its resolved string."""
+        storage_paths: set[Path] = set()
+        for real_file in download.real_files:
+            storage_paths.add(real_file.storage_path)
+            storage_paths.update(v.source_storage_path for v in real_file.verification)
+        storage_paths.update(ha.storage_path for ha in download.hash_archives)
+        return {p: str(p.resolve()) for p in storage_paths}
+
+    @staticmethod
+    def _ensure_storage_path(cur: sqlite3.Cursor, storage_path_str: str) -> None:
         _ = cur.execute(
             "INSERT OR IGNORE INTO storage_paths (storage_path) VALUES (?);",
-            (str(storage_path.resolve()),),
+            (storage_path_str,),
         )
 
     @staticmethod
     def _row_to_download(row: sqlite3.Row) -> Download:
         return Download(
-            title=row["title"],
-            first_seen=DownloadRepository._parse_datetime(row["first_seen"]),
-            last_seen=DownloadRepository._parse_datetime(row["last_seen"]),
-            comment=row["comment"],
-            processed=bool(row["processed"]),
+            title=row["download_title"],
+            first_seen=DownloadRepository._parse_datetime(row["download_first_seen"]),
+            last_seen=DownloadRepository._parse_datetime(row["download_last_seen"]),
+            comment=row["download_comment"],
+            processed=bool(row["download_processed"]),
         )
 
     @staticmethod
     def _parse_datetime(value: str | None) -> dt.datetime:
         if value is None:
             raise ValueError("Datetime field cannot be None")
-        return dt.datetime.fromisoformat(value)
+        return parse_iso_datetime(value)
 
 
 __all__ = ["DownloadRepository"]
@@ -7,6 +7,7 @@ from pathlib import Path, PurePath
 from typing import Iterable
 
 from ..archives import Algo
+from ..utils import parse_iso_datetime
 from .real_file import RealFile, Verification, VerificationSource
 
 
@@ -16,19 +17,14 @@ class RealFileRepository:
     def save(self, real_file: RealFile, con: sqlite3.Connection) -> None:
         """Insert or replace a RealFile and its verifications."""
         storage_path_str = str(real_file.storage_path.resolve())
-        real_file_row = self._build_real_file_row(real_file)
+        path_str = str(real_file.path)
+        real_file_row = self._build_real_file_row(real_file, path_str)
 
-        self._ensure_storage_path(con, real_file.storage_path)
         cur = con.cursor()
-        _ = cur.execute(
-            """
-            DELETE FROM real_files
-            WHERE storage_path_id = (SELECT id FROM storage_paths WHERE storage_path = ?)
-              AND path = ?;
-            """,
-            (storage_path_str, str(real_file.path)),
-        )
-        _ = cur.execute(
+        self._ensure_storage_path(cur, storage_path_str)
+        # Upserted rather than deleted and re-inserted, so the row keeps its id and
+        # the download_real_files rows referencing it are not cascaded away
+        real_file_id = cur.execute(
             """
             INSERT INTO real_files (
                 storage_path_id,
@@ -51,17 +47,32 @@ class RealFileRepository:
                    :last_seen AS last_seen,
                    :comment AS comment
             FROM storage_paths
-            WHERE storage_path = :storage_path;
+            WHERE storage_path = :storage_path
+            ON CONFLICT(storage_path_id, path) DO UPDATE SET
+                size = excluded.size,
+                is_dir = excluded.is_dir,
+                hash_value = excluded.hash_value,
+                algo = excluded.algo,
+                first_seen = excluded.first_seen,
+                last_seen = excluded.last_seen,
+                comment = excluded.comment
+            RETURNING id;
             """,
             real_file_row | {"storage_path": storage_path_str},
+        ).fetchone()[0]
+        # Verifications have no natural key, so they are replaced wholesale
+        _ = cur.execute(
+            "DELETE FROM verifications WHERE real_file_id = ?;", (real_file_id,)
         )
         if real_file.verification:
             for verification in real_file.verification:
-                self._ensure_storage_path(con, verification.source_storage_path)
+                self._ensure_storage_path(
+                    cur, str(verification.source_storage_path.resolve())
+                )
             verification_rows = list(
                 self._build_verification_rows(
                     real_file.verification,
-                    str(real_file.path),
+                    path_str,
                     storage_path_str,
                 )
             )
@@ -80,21 +91,21 @@ class RealFileRepository:
                     )
                     SELECT
                         real_files.id,
-                        :source_type,
-                        :source_path,
+                        ?,
+                        ?,
                         (
                             SELECT id
                             FROM storage_paths
-                            WHERE storage_path = :source_storage_path
+                            WHERE storage_path = ?
                         ) AS source_storage_path_id,
-                        :hash_value,
-                        :algo,
-                        :comment
+                        ?,
+                        ?,
+                        ?
                     FROM real_files
                     JOIN storage_paths
                       ON real_files.storage_path_id = storage_paths.id
-                    WHERE storage_paths.storage_path = :storage_path
-                      AND real_files.path = :path;
+                    WHERE storage_paths.storage_path = ?
+                      AND real_files.path = ?;
                     """,
                     verification_rows,
                 )
@@ -111,8 +122,9 @@ class RealFileRepository:
         storage_path_str = str(storage_path.resolve())
         path_str = str(path)
 
-        con.row_factory = sqlite3.Row
+        # Row factories go on the cursor; the connection is shared across calls
         cur = con.cursor()
+        cur.row_factory = sqlite3.Row
         rf_row = cur.execute(
             """
             SELECT real_files.*, storage_paths.storage_path
@@ -134,13 +146,13 @@ class RealFileRepository:
         return real_file
 
     @staticmethod
-    def _build_real_file_row(real_file: RealFile) -> dict[str, object]:
+    def _build_real_file_row(real_file: RealFile, path_str: str) -> dict[str, object]:
         return {
-            "path": str(real_file.path),
+            "path": path_str,
             "size": real_file.size,
-            "is_dir": int(real_file.is_dir),
+            "is_dir": real_file.is_dir,
             "hash_value": real_file.hash_value,
-            "algo": real_file.algo.value if real_file.algo is not None else None,
+            "algo": real_file.algo,
             "first_seen": real_file.first_seen.isoformat()
             if real_file.first_seen
             else None,
@@ -155,18 +167,19 @@ class RealFileRepository:
         verifications: Iterable[Verification],
         path: str,
         storage_path: str,
-    ) -> collections.abc.Iterator[dict[str, object | None]]:
+    ) -> collections.abc.Iterator[tuple[object | None, ...]]:
+        """Yield positional rows matching the parameter order of the verification INSERT."""
         for verification in verifications:
-            yield {
-                "source_type": verification.source_type.value,
-                "source_path": str(verification.source_path),
-                "source_storage_path": str(verification.source_storage_path.resolve()),
-                "hash_value": verification.hash_value,
-                "algo": verification.algo.value,
-                "comment": verification.comment,
-                "path": path,
-                "storage_path": storage_path,
-            }
+            yield (
+                verification.source_type,
+                str(verification.source_path),
+                str(verification.source_storage_path.resolve()),
+                verification.hash_value,
+                verification.algo,
+                verification.comment,
+                storage_path,
+                path,
+            )
 
     def _load_verifications(
         self,
@@ -175,6 +188,7 @@ class RealFileRepository:
         real_file: RealFile,
     ) -> list[Verification]:
         cursor = con.cursor()
+        cursor.row_factory = sqlite3.Row
         verification_rows = cursor.execute(
             """
             SELECT verifications.*, storage_paths.storage_path AS source_storage_path
@@ -187,26 +201,13 @@ class RealFileRepository:
             (real_file_db_id,),
         ).fetchall()
 
-        verifications: list[Verification] = []
-        for row in verification_rows:
-            verification = Verification(
-                real_file=real_file,
-                source_type=VerificationSource(row["source_type"]),
-                source_path=PurePath(row["source_path"]),
-                source_storage_path=Path(row["source_storage_path"]),
-                hash_value=row["hash_value"],
-                algo=Algo(row["algo"]),
-                comment=row["comment"],
-            )
-            verifications.append(verification)
-        return verifications
+        return [self._row_to_verification(row, real_file) for row in verification_rows]
 
     @staticmethod
-    def _ensure_storage_path(con: sqlite3.Connection, storage_path: Path) -> None:
-        cur = con.cursor()
+    def _ensure_storage_path(cur: sqlite3.Cursor, storage_path_str: str) -> None:
         _ = cur.execute(
             "INSERT OR IGNORE INTO storage_paths (storage_path) VALUES (?);",
-            (str(storage_path.resolve()),),
+            (storage_path_str,),
         )
 
     @staticmethod
@@ -223,9 +224,24 @@ class RealFileRepository:
             comment=row["comment"],
         )
 
+    @staticmethod
+    def _row_to_verification(
+        row: sqlite3.Row, real_file: RealFile, prefix: str = ""
+    ) -> Verification:
+        """Build a Verification from a row whose verification columns carry prefix."""
+        return Verification(
+            real_file=real_file,
+            source_type=VerificationSource(row[f"{prefix}source_type"]),
+            source_path=PurePath(row[f"{prefix}source_path"]),
+            source_storage_path=Path(row[f"{prefix}source_storage_path"]),
+            hash_value=row[f"{prefix}hash_value"],
+            algo=Algo(row[f"{prefix}algo"]),
+            comment=row[f"{prefix}comment"],
+        )
+
     @staticmethod
     def _parse_datetime(value: str | None) -> dt.datetime | None:
-        return dt.datetime.fromisoformat(value) if value else None
+        return parse_iso_datetime(value) if value else None
 
 
 __all__ = ["RealFileRepository"]
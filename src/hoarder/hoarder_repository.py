@@ -1,27 +1,53 @@
 from __future__ import annotations
 
 import collections.abc
+import contextlib
 import sqlite3
+import threading
 from pathlib import Path, PurePath
+from types import TracebackType
 
 from .archives import HashArchive, HashArchiveRepository
 from .downloads import Download, DownloadRepository, RealFile, RealFileRepository
 from .passwords import PasswordSqlite3Repository, PasswordStore
-from .utils import Sqlite3FK
+from .utils import open_connection
 from .utils.db_schema import ensure_repository_tables
 
+_INSERT_STORAGE_PATH_SQL = (
+    "INSERT OR IGNORE INTO storage_paths (storage_path) VALUES (?);"
+)
 
 class HoarderRepository:
-    """Facade that combines archive and real file repositories with one connection."""
+    """Facade that combines archive and real file repositories with one connection.
+
+    The connection may be used from any thread; transactions are serialized by a
+    lock, so concurrent callers take turns rather than interleave.
+    """
 
     def __init__(
         self, db_path: str | Path, allowed_storage_paths: collections.abc.Iterable[Path]
     ) -> None:
         self.db_path = Path(db_path)
         self.allowed_storage_paths = self._normalize_paths(allowed_storage_paths)
+        # String forms of the allowed paths, as bound in storage_paths rows
+        self._storage_path_strs: dict[Path, str] = {
+            p: str(p) for p in self.allowed_storage_paths
+        }
+        # Path.resolve() stats every path component, so absolute input paths are
+        # resolved once per repository; relative ones depend on the working
+        # directory and are resolved every time
+        self._resolve_cache: dict[Path, Path] = {}
 
         ensure_repository_tables(self.db_path)
 
+        # One connection for the lifetime of the repository, so PRAGMAs, the schema
+        # cache and sqlite3's statement cache are paid for once; transactions are
+        # managed explicitly by _tx, which also holds _lock for each transaction
+        self._con = open_connection(
+            self.db_path, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+
         self.hash_repo = HashArchiveRepository()
         self.real_file_repo = RealFileRepository()
         self.download_repo = DownloadRepository(self.real_file_repo, self.hash_repo)
@@ -32,16 +58,20 @@ class HoarderRepository:
 
     def save_hash_archive(self, archive: HashArchive) -> None:
         normalized_storage_path = self._check_storage_path_allowed(archive.storage_path)
-        with Sqlite3FK(self.db_path) as con:
-            self._ensure_storage_path(con, normalized_storage_path)
+        with self._tx(immediate=True) as con:
+            self._ensure_storage_path(
+                con, self._storage_path_strs[normalized_storage_path]
+            )
             self.hash_repo.save(archive, con)
 
     def load_hash_archive(
         self, storage_path: Path, path: PurePath | str
     ) -> HashArchive:
         normalized_storage_path = self._check_storage_path_allowed(storage_path)
-        with Sqlite3FK(self.db_path) as con:
-            self._ensure_storage_path(con, normalized_storage_path)
+        with self._tx() as con:
+            self._ensure_storage_path(
+                con, self._storage_path_strs[normalized_storage_path]
+            )
             return self.hash_repo.load(normalized_storage_path, path, con)
 
     def save_real_file(self, real_file: RealFile) -> None:
@@ -52,23 +82,27 @@ class HoarderRepository:
             verification.source_storage_path = self._check_storage_path_allowed(
                 verification.source_storage_path
             )
-        with Sqlite3FK(self.db_path) as con:
-            self._ensure_storage_path(con, normalized_storage_path)
+        with self._tx(immediate=True) as con:
+            self._ensure_storage_path(
+                con, self._storage_path_strs[normalized_storage_path]
+            )
             self.real_file_repo.save(real_file, con)
 
     def load_real_file(self, storage_path: Path, path: PurePath | str) -> RealFile:
         normalized_storage_path = self._check_storage_path_allowed(storage_path)
-        with Sqlite3FK(self.db_path) as con:
-            self._ensure_storage_path(con, normalized_storage_path)
+        with self._tx() as con:
+            self._ensure_storage_path(
+                con, self._storage_path_strs[normalized_storage_path]
+            )
             return self.real_file_repo.load(normalized_storage_path, path, con)
 
     def save_password_store(self, store: PasswordStore) -> None:
-        with Sqlite3FK(self.db_path) as con:
+        with self._tx(immediate=True) as con:
             self.password_repo.ensure_tables(con)
             self.password_repo.save(store, con)
 
     def load_password_store(self) -> PasswordStore:
-        with Sqlite3FK(self.db_path) as con:
+        with self._tx() as con:
             self.password_repo.ensure_tables(con)
             return self.password_repo.load(con)
 
@@ -89,31 +123,68 @@ class HoarderRepository:
                 hash_archive.storage_path
             )
             hash_archive.storage_path = normalized_storage_path
-        with Sqlite3FK(self.db_path) as con:
-            # Ensure all storage paths exist
-            for real_file in download.real_files:
-                self._ensure_storage_path(con, real_file.storage_path)
-            for hash_archive in download.hash_archives:
-                self._ensure_storage_path(con, hash_archive.storage_path)
+        storage_paths = {
+            self._storage_path_strs[rf.storage_path] for rf in download.real_files
+        }
+        storage_paths.update(
+            self._storage_path_strs[ha.storage_path] for ha in download.hash_archives
+        )
+        with self._tx(immediate=True) as con:
+            # Ensure all storage paths exist, one statement for the distinct paths
+            self._ensure_storage_paths(con, storage_paths)
             self.download_repo.save(download, con)
 
     def load_download(self, title: str) -> Download:
-        with Sqlite3FK(self.db_path) as con:
+        with self._tx() as con:
             return self.download_repo.load(title, con)
 
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._con.close()
+
+    def __enter__(self) -> HoarderRepository:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def _tx(
+        self, immediate: bool = False
+    ) -> collections.abc.Iterator[sqlite3.Connection]:
+        """Run the block in one transaction on the shared connection.
+
+        Commits on success and rolls back on any exception. With immediate=True the
+        write lock is taken up front via BEGIN IMMEDIATE.
+        """
+        with self._lock:
+            _ = self._con.execute("BEGIN IMMEDIATE;" if immediate else "BEGIN;")
+            try:
+                yield self._con
+            except BaseException:
+                self._con.rollback()
+                raise
+            else:
+                self._con.commit()
+
     def _initialize_storage_paths(self) -> None:
-        with Sqlite3FK(self.db_path) as con:
-            for storage_path in self.allowed_storage_paths:
-                self._ensure_storage_path(con, storage_path)
+        with self._tx() as con:
+            self._ensure_storage_paths(con, self._storage_path_strs.values())
 
     def _initialize_password_tables(self) -> None:
-        with Sqlite3FK(self.db_path) as con:
+        with self._tx() as con:
             self.password_repo.ensure_tables(con)
 
     @staticmethod
     def _normalize_paths(
         storage_paths: collections.abc.Iterable[Path],
-    ) -> set[Path]:
+    ) -> frozenset[Path]:
         normalized_paths: set[Path] = set()
         for path in storage_paths:
             resolved = path.resolve()
@@ -124,17 +195,26 @@ class HoarderRepository:
             normalized_paths.add(resolved)
         if not normalized_paths:
             raise ValueError("At least one allowed storage path is required")
-        return normalized_paths
+        return frozenset(normalized_paths)
+
+    def _ensure_storage_path(self, con: sqlite3.Connection, storage_path: str) -> None:
+        _ = con.execute(_INSERT_STORAGE_PATH_SQL, (storage_path,))
 
-    def _ensure_storage_path(self, con: sqlite3.Connection, storage_path: Path) -> None:
-        cur = con.cursor()
-        _ = cur.execute(
-            "INSERT OR IGNORE INTO storage_paths (storage_path) VALUES (?);",
-            (str(storage_path),),
+    def _ensure_storage_paths(
+        self, con: sqlite3.Connection, storage_paths: collections.abc.Iterable[str]
+    ) -> None:
+        _ = con.executemany(
+            _INSERT_STORAGE_PATH_SQL, [(path,) for path in storage_paths]
         )
 
     def _check_storage_path_allowed(self, storage_path: Path) -> Path:
-        normalized = storage_path.resolve()
+        normalized = self._resolve_cache.get(storage_path)
+        if normalized is None:
+            normalized = storage_path.resolve()
+            # Only paths that resolve into the allowed set are kept, so the cache
+            # stays as small as the set of storage paths
+            if storage_path.is_absolute() and normalized in self.allowed_storage_paths:
+                self._resolve_cache[storage_path] = normalized
         if normalized not in self.allowed_storage_paths:
             raise ValueError(
                 f"Storage path '{normalized}' is not in the allowed set. "
@@ -1,12 +1,14 @@
 """NZB password extraction plugin."""
 
+import concurrent.futures
+import io
 import logging
 import os
 import pathlib
 import re
+import tempfile
 import traceback
-import xml.etree.ElementTree as ET
-from typing import Callable, NamedTuple
+from typing import IO, Any, Callable, ContextManager, Iterator, NamedTuple
 
 from ..archives.rar_archive import RarArchive
 from ..utils import TableFormatter
@@ -18,8 +20,46 @@ try:
 except ImportError:
     from typing_extensions import override
 
+# libxml2 parses considerably faster than expat when lxml is installed; both expose
+# the same iterparse/ParseError API used below
+try:
+    from lxml import etree as ET  # type: ignore [import-not-found]
+
+    # Never fetch external DTDs or expand entities from untrusted NZBs
+    _ITERPARSE_OPTIONS: dict[str, Any] = {"resolve_entities": False, "no_network": True}
+    # XMLSyntaxError, raised for malformed input, subclasses lxml's ParseError;
+    # lxml raises ValueError for some unparseable input as well
+    _PARSE_ERRORS: tuple[type[Exception], ...] = (ET.ParseError, ValueError)
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+    _ITERPARSE_OPTIONS = {}
+    _PARSE_ERRORS = (ET.ParseError,)
+
 logger = logging.getLogger("hoarder.passwords.nzb_password_plugin")
 
+# NZB content is either already in memory, a path that is parsed from disk, or an
+# open binary stream
+NzbContent = bytes | str | pathlib.PurePath | IO[bytes]
+
+_NZB_NS = "{http://www.newzbin.com/DTD/2003/nzb}"
+_NZB_META_TAG = f"{_NZB_NS}meta"
+_NZB_FILE_TAG = f"{_NZB_NS}file"
+
+# Content that shows neither an XML declaration nor an <nzb> root this early is
+# not parsed at all
+_XML_SNIFF_LEN = 512
+# Str content is already decoded, so its declared encoding no longer applies
+_XML_DECLARATION = re.compile(r"\A\ufeff?\s*<\?xml[^>]*\?>")
+
+# Below this many NZB files, starting worker processes costs more than it saves
+_PARALLEL_MIN_FILES = 64
+_PARALLEL_CHUNKSIZE = 16
+
+# Directories that never hold NZBs are not descended into; hidden directories
+# (.git and the like) are skipped as well
+_DEFAULT_IGNORED_DIRS = frozenset({"__pycache__", "node_modules"})
+
 
 class ArchiveEntry(NamedTuple):
     title: str
@@ -35,13 +75,16 @@ class NzbPasswordPlugin(PasswordPlugin):
     """Plugin to extract passwords from NZB filenames with {{password}} format."""
 
     _nzb_paths: list[pathlib.Path]
+    _ignored_dirs: frozenset[str]
 
     @override
     def __init__(self, config: dict[str, list[str]]):
         """Initialize the NzbPasswordPlugin with configuration.
 
         Args:
-            config (dict[str, list[str]]): Configuration dictionary
+            config (dict[str, list[str]]): Configuration dictionary. 'nzb_paths'
+                lists the directories to scan; the optional 'ignore_dirs' names
+                further directories to skip while scanning them.
 
         Raises:
             KeyError: If 'nzb_paths' is not present in the config dictionary.
@@ -64,6 +107,7 @@ class NzbPasswordPlugin(PasswordPlugin):
                 )
             )
         self._nzb_paths = paths
+        self._ignored_dirs = _DEFAULT_IGNORED_DIRS.union(config.get("ignore_dirs", []))
 
     @staticmethod
     def _extract_pw_from_nzb_filename(
@@ -81,8 +125,24 @@ class NzbPasswordPlugin(PasswordPlugin):
             ValueError: If multiple passwords are found in the filename, indicating ambiguity.
         """
         filename = file_path.stem
-        filename_passwords = re.findall(r"\{\{(.+?)\}\}", filename)
-        title = re.sub(r"\{\{.+?\}\}", "", filename).strip()
+        # Most names carry no password; a substring search exits right away for them
+        start = filename.find("{{")
+        if start < 0:
+            return ArchiveEntry(title=filename.strip(), password=None)
+        # Collect every non-empty {{...}} and the spans between them for the title
+        filename_passwords: list[str] = []
+        title_parts: list[str] = []
+        last_end = 0
+        while start >= 0:
+            end = filename.find("}}", start + 3)
+            if end < 0:
+                break
+            filename_passwords.append(filename[start + 2 : end])
+            title_parts.append(filename[last_end:start])
+            last_end = end + 2
+            start = filename.find("{{", last_end)
+        title_parts.append(filename[last_end:])
+        title = "".join(title_parts).strip()
         if len(filename_passwords) >= 2:
             logger.error(f"Error when extracting password from {file_path}")
             raise ValueError("Ambiguous passwords")
@@ -91,11 +151,14 @@ class NzbPasswordPlugin(PasswordPlugin):
         return ArchiveEntry(title=title, password=filename_passwords[0])
 
     @staticmethod
-    def _extract_pw_from_nzb_file_content(content: bytes | str) -> str | None:
+    def _extract_pw_from_nzb_file_content(content: NzbContent) -> str | None:
         """Extract password from NZB file content within <header><meta type="password">password</meta></header>.
 
+        The document is parsed incrementally and scanning stops at the password
+        meta or at the first <file> element, since the header precedes all files.
+
         Args:
-            content (bytes | str): The content of the NZB file.
+            content (NzbContent): The NZB file content, or the path to read it from.
 
         Returns:
             str | None: The extracted password, or None if no password is found or extraction fails.
@@ -104,86 +167,222 @@ class NzbPasswordPlugin(PasswordPlugin):
         try:
             logger.debug("Extracting password from file content")
 
-            root = ET.fromstring(content)
-            ns = {"nzb": "http://www.newzbin.com/DTD/2003/nzb"}
-
-            for meta in root.findall('.//nzb:meta[@type="password"]', ns):
-                if meta.text:
-                    password = meta.text.strip()
-                    break
-        except (ET.ParseError, OSError, UnicodeDecodeError):
+            if isinstance(content, pathlib.PurePath):
+                with open(content, "rb") as f:
+                    if NzbPasswordPlugin._stream_looks_like_xml(f):
+                        password = NzbPasswordPlugin._scan_nzb_stream(f)
+            elif isinstance(content, bytes):
+                if NzbPasswordPlugin._looks_like_xml(content[:_XML_SNIFF_LEN]):
+                    password = NzbPasswordPlugin._scan_nzb_stream(io.BytesIO(content))
+            elif isinstance(content, str):
+                if NzbPasswordPlugin._looks_like_xml(content[:_XML_SNIFF_LEN]):
+                    # lxml only parses bytes streams, so both backends get bytes;
+                    # without the declaration both read them as the UTF-8 they are
+                    content = _XML_DECLARATION.sub("", content, count=1)
+                    password = NzbPasswordPlugin._scan_nzb_stream(
+                        io.BytesIO(content.encode("utf-8"))
+                    )
+            elif NzbPasswordPlugin._stream_looks_like_xml(content):
+                password = NzbPasswordPlugin._scan_nzb_stream(content)
+        except (*_PARSE_ERRORS, OSError, UnicodeDecodeError):
             logger.debug("Failure extracting password from content")
             print(traceback.format_exc())
         return password
 
+    @staticmethod
+    def _looks_like_xml(head: bytes | str) -> bool:
+        """Check the start of some content for an XML declaration or NZB root."""
+        if isinstance(head, str):
+            return "<?xml" in head or "<nzb" in head
+        return b"<?xml" in head or b"<nzb" in head
+
+    @staticmethod
+    def _stream_looks_like_xml(stream: IO[bytes]) -> bool:
+        """Sniff a buffered stream without consuming it; unbuffered streams pass."""
+        peek = getattr(stream, "peek", None)
+        if peek is None:
+            return True
+        return NzbPasswordPlugin._looks_like_xml(peek(_XML_SNIFF_LEN)[:_XML_SNIFF_LEN])
+
+    @staticmethod
+    def _scan_nzb_stream(stream: IO[bytes]) -> str | None:
+        """Return the first non-empty password meta of an NZB stream, if any."""
+        for event, elem in ET.iterparse(
+            stream, events=("start", "end"), **_ITERPARSE_OPTIONS
+        ):
+            if event == "start":
+                if elem.tag == _NZB_FILE_TAG:
+                    # The header is over, no password meta can follow
+                    return None
+                continue
+            if elem.tag == _NZB_META_TAG and elem.get("type") == "password":
+                if elem.text:
+                    return elem.text.strip()
+            # Drop finished elements so memory stays flat on large files
+            elem.clear()
+        return None
+
     @staticmethod
     def _process_file(
         p: pathlib.PurePath,
-        read_file_content: Callable[[pathlib.PurePath], bytes | str],
+        open_file_content: Callable[[pathlib.PurePath], ContextManager[IO[bytes]]],
     ) -> SecureArchiveEntry | None:
         """Process an NZB file to extract its title and password.
 
+        The caller is responsible for only passing files with an .nzb suffix.
+
         Args:
             p (pathlib.PurePath): Path to the file to process.
-            read_file_content (Callable[[pathlib.PurePath], bytes | str]): Function to read the file content.
+            open_file_content (Callable[[pathlib.PurePath], ContextManager[IO[bytes]]]): Function
+                opening the file content as a binary stream.
 
         Returns:
             SecureArchiveEntry: contains title and password if both are found, otherwise None.
         """
         logger.debug(f"Read {p}... extracting passwords")
-        title: str | None = None
-        password: str | None = None
-        if p.suffix == ".nzb":
-            (
-                title,
-                password,
-            ) = NzbPasswordPlugin._extract_pw_from_nzb_filename(p)
-            if not password:
-                content = read_file_content(p)
-                password = NzbPasswordPlugin._extract_pw_from_nzb_file_content(content)
+        # Callers only pass .nzb files, so the name is parsed without re-checking it
+        title, password = NzbPasswordPlugin._extract_pw_from_nzb_filename(p)
+        if not password:
+            # Streamed, so parsing can stop at the header without reading the rest
+            with open_file_content(p) as stream:
+                password = NzbPasswordPlugin._extract_pw_from_nzb_file_content(stream)
         if title and password:
             return SecureArchiveEntry(title=title, password=password)
         else:
             return None
 
+    @staticmethod
+    def _iter_nzb_entries(
+        directory: str | os.PathLike[str],
+        ignored_dirs: frozenset[str] = _DEFAULT_IGNORED_DIRS,
+    ) -> Iterator[os.DirEntry[str]]:
+        """Recursively yield the NZB and RAR files below a directory.
+
+        Hidden subdirectories and those named in ignored_dirs are not descended into.
+
+        Args:
+            directory (str | os.PathLike[str]): Directory to scan.
+            ignored_dirs (frozenset[str]): Names of subdirectories to skip.
+
+        Yields:
+            os.DirEntry[str]: Entries for the .nzb and .rar files found.
+        """
+        # An explicit stack avoids a generator frame per directory level
+        pending: list[str | os.PathLike[str]] = [directory]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        name = entry.name
+                        if not name.startswith(".") and name not in ignored_dirs:
+                            pending.append(entry.path)
+                    elif entry.name.endswith((".nzb", ".rar")):
+                        yield entry
+
     @staticmethod
     def _process_directory(
         nzb_directory: pathlib.Path,
+        ignored_dirs: frozenset[str] = _DEFAULT_IGNORED_DIRS,
     ) -> PasswordStore:
         """Process all NZB and RAR files in a directory to extract passwords.
 
         Args:
             nzb_directory (pathlib.Path): Directory containing NZB and RAR files.
+            ignored_dirs (frozenset[str]): Names of subdirectories to skip.
 
         Returns:
             PasswordStore: A PasswordStore containing extracted title-password pairs.
         """
         dir_store = PasswordStore()
-        for root, _, files in os.walk(nzb_directory):
-            for file in files:
-                full_path: pathlib.Path = nzb_directory / root / file
-                if full_path.suffix == ".nzb":
-                    title_password = NzbPasswordPlugin._process_file(
-                        full_path, read_file_content=lambda fp: open(fp, "r").read()
+        title_passwords: list[SecureArchiveEntry] = []
+        nzb_paths: list[str] = []
+        rar_paths: list[pathlib.PurePath] = []
+        for entry in NzbPasswordPlugin._iter_nzb_entries(
+            nzb_directory, ignored_dirs
+        ):
+            if entry.name.endswith(".nzb"):
+                nzb_paths.append(entry.path)
+            elif entry.name.endswith(".rar"):
+                rar_paths.append(pathlib.PurePath(entry.path))
+
+        # RAR work happens in 7z subprocesses, so threads overlap it without
+        # contending for the GIL
+        if rar_paths:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(len(rar_paths), os.cpu_count() or 1)
+            ) as executor:
+                for rar_entries in executor.map(
+                    lambda path: NzbPasswordPlugin._process_rar_path(
+                        nzb_directory, path
+                    ),
+                    rar_paths,
+                ):
+                    title_passwords.extend(rar_entries)
+
+        # Plain NZB files are independent, so large directories are parsed in parallel
+        if len(nzb_paths) >= _PARALLEL_MIN_FILES:
+            with concurrent.futures.ProcessPoolExecutor() as executor:
+                results = list(
+                    executor.map(
+                        _process_nzb_path, nzb_paths, chunksize=_PARALLEL_CHUNKSIZE
                     )
-                    if title_password:
-                        dir_store.add_password(*title_password)
-                elif full_path.suffix == ".rar":
-                    logger.debug(f"Processing RARed NZB(s) {full_path}")
-                    path = pathlib.PurePath(full_path)
-                    rar_file: RarArchive = RarArchive.from_path(nzb_directory, path)
-                    for file_entry in rar_file.files:
-                        logger.debug(f"Read {file_entry.path}... extracting passwords")
-                        title_password = NzbPasswordPlugin._process_file(
-                            file_entry.path,
-                            read_file_content=lambda fp: rar_file.read_file(
-                                file_entry.path
-                            ),
-                        )
-                        if title_password:
-                            dir_store.add_password(*title_password)
+                )
+        else:
+            results = [_process_nzb_path(nzb_path) for nzb_path in nzb_paths]
+        title_passwords.extend(tp for tp in results if tp)
+        dir_store.add_many(title_passwords)
         return dir_store
 
+    @staticmethod
+    def _process_rar_path(
+        nzb_directory: pathlib.Path, path: pathlib.PurePath
+    ) -> list[SecureArchiveEntry]:
+        """Open the RAR archive at path and extract the passwords of its NZB files."""
+        logger.debug(f"Processing RARed NZB(s) {path}")
+        rar_file: RarArchive = RarArchive.from_path(nzb_directory, path)
+        return NzbPasswordPlugin._process_rar(rar_file)
+
+    @staticmethod
+    def _process_rar(rar_file: RarArchive) -> list[SecureArchiveEntry]:
+        """Extract the title-password pairs of all NZB files inside a RAR archive.
+
+        NZBs whose names carry no password are extracted together in one 7z run
+        rather than one run per member, which for solid archives would decompress
+        everything before the member again each time.
+
+        Args:
+            rar_file (RarArchive): Archive containing NZB files.
+
+        Returns:
+            list[SecureArchiveEntry]: The title-password pairs found.
+        """
+        members = [
+            entry.path
+            for entry in rar_file
+            if not entry.is_dir and entry.path.name.endswith(".nzb")
+        ]
+        needs_content = [
+            member
+            for member in members
+            if NzbPasswordPlugin._extract_pw_from_nzb_filename(member).password is None
+        ]
+        title_passwords: list[SecureArchiveEntry] = []
+        with tempfile.TemporaryDirectory() as extract_dir:
+            extract_path = pathlib.Path(extract_dir)
+            rar_file.extract_files(needs_content, extract_path)
+
+            def open_extracted(member: pathlib.PurePath) -> IO[bytes]:
+                return open(extract_path / member, "rb")
+
+            for member in members:
+                logger.debug(f"Read {member}... extracting passwords")
+                title_password = NzbPasswordPlugin._process_file(
+                    member, open_file_content=open_extracted
+                )
+                if title_password:
+                    title_passwords.append(title_password)
+        return title_passwords
+
     @override
     def extract_passwords(self) -> PasswordStore:
         """Extract passwords from all configured NZB directories.
@@ -193,10 +392,24 @@ class NzbPasswordPlugin(PasswordPlugin):
         """
         password_store = PasswordStore()
         for p in self._nzb_paths:
-            password_store = password_store | NzbPasswordPlugin._process_directory(p)
+            password_store.update(
+                NzbPasswordPlugin._process_directory(p, self._ignored_dirs)
+            )
         return password_store
 
 
+def _open_binary(path: pathlib.PurePath) -> IO[bytes]:
+    """Open a file on disk for binary reading."""
+    return open(path, "rb")
+
+
+def _process_nzb_path(nzb_path: str) -> SecureArchiveEntry | None:
+    """Process one NZB file on disk; module level so worker processes can run it."""
+    return NzbPasswordPlugin._process_file(
+        pathlib.Path(nzb_path), open_file_content=_open_binary
+    )
+
+
 if __name__ == "__main__":
     config = {"nzb_paths": [r"D:\nzbs"]}
     plug_instance = NzbPasswordPlugin(config)
@@ -1,9 +1,10 @@
 """Password store module for managing title-password associations."""
 from __future__ import annotations
 
-import copy
+import sys
 from collections import defaultdict
-from collections.abc import Iterator
+from collections.abc import ItemsView, Iterable, Iterator, Set
+from types import MappingProxyType
 
 from hoarder.utils.presentation import PresentationSpec, ScalarValue
 
@@ -20,7 +21,7 @@ class PasswordStore:
         self._store: dict[str, set[str]] = defaultdict(set)
         if data is not None:
             for title, passwords in data.items():
-                self._store[title] = set(passwords)
+                self._store[sys.intern(title)] = {sys.intern(pw) for pw in passwords}
 
     def __getitem__(self, title: str) -> set[str]:
         """Get all passwords for the specified title."""
@@ -34,6 +35,26 @@ class PasswordStore:
 
     def add_password(self, title: str, password: str) -> None:
         """Add a password to the specified title."""
+        self._validate_entry(title, password)
+        # Titles repeat across directories and default passwords across titles, so
+        # both share one string object per distinct value
+        self._store[sys.intern(title)].add(sys.intern(password))
+
+    def add_many(self, pairs: Iterable[tuple[str, str]]) -> None:
+        """Add several (title, password) pairs, merging each title's passwords at once.
+
+        All pairs are validated before the store is touched, so an invalid pair
+        leaves the store unchanged.
+        """
+        pending: dict[str, set[str]] = defaultdict(set)
+        for title, password in pairs:
+            self._validate_entry(title, password)
+            pending[sys.intern(title)].add(sys.intern(password))
+        for title, passwords in pending.items():
+            self._store[title] |= passwords
+
+    @staticmethod
+    def _validate_entry(title: str, password: str) -> None:
         if not isinstance(title, str):
             raise TypeError(f"title must be str, got {type(title).__name__}")
         if not isinstance(password, str):
@@ -42,7 +63,6 @@ class PasswordStore:
             raise ValueError("Empty title")
         if password == "":
             raise ValueError("Empty password")
-        self._store[title].add(password)
 
     def remove_password(self, title: str, password: str) -> bool:
         """Remove a password from the specified title.
@@ -58,14 +78,31 @@ class PasswordStore:
         for title, passwords in self._store.items():
             yield title, passwords.copy()
 
+    def items(self) -> ItemsView[str, Set[str]]:
+        """Get a read-only view of (title, passwords) pairs without copying any sets.
+
+        Unlike iterating the store, the password sets are the store's own and must
+        not be modified; meant for read-only consumers such as repositories.
+        """
+        return MappingProxyType(self._store).items()
+
+    def update(self, other: PasswordStore) -> None:
+        """Merge all passwords of another store into this one in place.
+
+        The other store's entries were validated when they were added, so whole
+        password sets are merged without going through add_password.
+        """
+        for title, passwords in other._store.items():
+            if passwords:
+                self._store[title] |= passwords
+
     def __ior__(self, p: PasswordStore) -> PasswordStore:
-        for title, passwords in p:
-            for password in passwords:
-                self.add_password(title, password)
+        self.update(p)
         return self
 
     def __or__(self, p: PasswordStore) -> PasswordStore:
-        self_copy = copy.deepcopy(self)
+        # Titles and passwords are immutable strings, only the sets need copying
+        self_copy = PasswordStore(self._store)
         self_copy |= p
         return self_copy
 
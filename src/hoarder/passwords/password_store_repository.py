@@ -48,6 +48,15 @@ class PasswordSqlite3Repository(PasswordRepository):
     );
     """
 
+    _INSERT_TITLE: str = (
+        "INSERT INTO titles (title) VALUES (?) ON CONFLICT DO NOTHING;"
+    )
+
+    _INSERT_PASSWORD: str = (
+        "INSERT INTO passwords(title_id, password) SELECT id AS title_id, ? AS password "
+        "FROM titles WHERE title = ?"
+    )
+
     @staticmethod
     def ensure_tables(con: sqlite3.Connection) -> None:
         """Create the database tables if they don't exist."""
@@ -60,17 +69,20 @@ class PasswordSqlite3Repository(PasswordRepository):
         """Save the given PasswordStore to persistent storage."""
         self.ensure_tables(con)
         cur = con.cursor()
-        for title, passwords in store:
-            _ = cur.execute(
-                "INSERT INTO titles (title) VALUES (:title) ON CONFLICT DO NOTHING;",
-                {"title": title},
-            )
-            for password in passwords:
-                _ = cur.execute(
-                    "INSERT INTO passwords(title_id, password) SELECT id AS title_id, :password AS password "
-                    "FROM titles WHERE title = :title",
-                    {"password": password, "title": title},
-                )
+        entries = store.items()
+        # One prepared statement per table; the caller owns the enclosing transaction
+        _ = cur.executemany(
+            PasswordSqlite3Repository._INSERT_TITLE,
+            [(title,) for title, _passwords in entries],
+        )
+        _ = cur.executemany(
+            PasswordSqlite3Repository._INSERT_PASSWORD,
+            [
+                (password, title)
+                for title, passwords in entries
+                for password in passwords
+            ],
+        )
 
     @override
     def load(self, con: sqlite3.Connection) -> PasswordStore:
@@ -1,9 +1,9 @@
 from . import db_schema, db_utils, path_utils, presentation, shared, sql3_fk
-from .db_utils import now_str
+from .db_utils import now_str, parse_iso_datetime
 from .path_utils import PathType, determine_path_type
 from .presentation import Presentable, PresentationSpec, ScalarValue, TableFormatter
 from .shared import SEVENZIP, config
-from .sql3_fk import Sqlite3FK
+from .sql3_fk import Sqlite3FK, configure_connection, open_connection
 
 __all__ = [
     "db_schema",
@@ -16,8 +16,11 @@ __all__ = [
     "PresentationSpec",
     "ScalarValue",
     "Sqlite3FK",
+    "configure_connection",
+    "open_connection",
     "TableFormatter",
     "now_str",
+    "parse_iso_datetime",
     "PathType",
     "determine_path_type",
     "SEVENZIP",
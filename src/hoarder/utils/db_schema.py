@@ -48,6 +48,12 @@ CREATE TABLE IF NOT EXISTS file_entries (
 );
 """
 
+# Serves the archive_id lookups in load/save and the ON DELETE CASCADE from hash_archives
+_CREATE_FILE_ENTRIES_ARCHIVE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_file_entries_archive_id_path
+    ON file_entries(archive_id, path);
+"""
+
 _CREATE_REAL_FILES = """
 CREATE TABLE IF NOT EXISTS real_files (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -133,6 +139,7 @@ def ensure_repository_tables(db_path: str | Path) -> None:
         _ = cur.execute(_CREATE_STORAGE_PATHS)
         _ = cur.execute(_CREATE_HASH_ARCHIVES)
         _ = cur.execute(_CREATE_FILE_ENTRIES)
+        _ = cur.execute(_CREATE_FILE_ENTRIES_ARCHIVE_INDEX)
         _ = cur.execute(_CREATE_REAL_FILES)
         _ = cur.execute(_CREATE_VERIFICATIONS)
         _ = cur.execute(_CREATE_DOWNLOADS)
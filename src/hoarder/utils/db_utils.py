@@ -1,7 +1,18 @@
 import datetime
+import functools
 
 
 def now_str() -> str:
     return datetime.datetime.strftime(
         datetime.datetime.now().astimezone(), "%Y-%m-%d %H:%M:%S%z"
     )
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_iso_datetime(value: str) -> datetime.datetime:
+    """Parse a timestamp written by datetime.isoformat().
+
+    Rows loaded together usually share timestamps, so results are memoized;
+    datetime objects are immutable and safe to share between rows.
+    """
+    return datetime.datetime.fromisoformat(value)
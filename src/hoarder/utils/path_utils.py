@@ -10,8 +10,9 @@ class PathType(enum.IntEnum):
 
 
 def determine_path_type(path: str | pathlib.Path) -> PathType:
-    has_backslash = "\\" in str(path)
-    has_forwardslash = "/" in str(path)
+    path_str = path if isinstance(path, str) else str(path)
+    has_backslash = "\\" in path_str
+    has_forwardslash = "/" in path_str
 
     if has_backslash and has_forwardslash:
         return PathType.UNRESOLVABLE
@@ -149,29 +149,43 @@ class TableFormatter:
                 if key not in columns:
                     columns.append(key)
 
-        # Calculate column widths
-        col_widths: dict[str, int] = {}
+        # Format every cell once, truncated, and track the column widths in the same pass
+        col_widths: dict[str, int] = {col: len(col) for col in columns}
+        formatted_rows: list[list[str]] = []
+        for row in rows:
+            formatted_row: list[str] = []
+            for col in columns:
+                formatted_value = self._format_value(row.get(col))
+                if len(formatted_value) > self.MAX_COL_WIDTH:
+                    formatted_value = formatted_value[: self.MAX_COL_WIDTH - 3] + "..."
+                if len(formatted_value) > col_widths[col]:
+                    col_widths[col] = len(formatted_value)
+                formatted_row.append(formatted_value)
+            formatted_rows.append(formatted_row)
         for col in columns:
-            header_width = len(col)
-            max_value_width = max(len(self._format_value(row.get(col))) for row in rows)
-            col_widths[col] = min(
-                self.MAX_COL_WIDTH, max(header_width, max_value_width)
-            )
+            col_widths[col] = min(self.MAX_COL_WIDTH, col_widths[col])
 
         # Build table
         lines: list[str] = []
 
+        # Border segments only depend on the column widths, so build them once
+        heavy_segments = ["━" * (col_widths[col] + 2) for col in columns]
+        light_segments = ["─" * (col_widths[col] + 2) for col in columns]
+        row_separator = f"┠{'┼'.join(light_segments)}┨"
+        # Data rows are rendered through one template with the padding built in
+        row_template = (
+            "┃" + "│".join(f" {{:<{col_widths[col]}}} " for col in columns) + "┃"
+        )
+
         # Top border
-        top_segments = [f"━{'━' * col_widths[col]}━" for col in columns]
-        lines.append(f"┏{'┳'.join(top_segments)}┓")
+        lines.append(f"┏{'┳'.join(heavy_segments)}┓")
 
         # Header row
         header_cells = [f" {col.ljust(col_widths[col])} " for col in columns]
         lines.append(f"┃{'┃'.join(header_cells)}┃")
 
         # Header separator
-        sep_segments = [f"━{'━' * col_widths[col]}━" for col in columns]
-        lines.append(f"┣{'╇'.join(sep_segments)}┫")
+        lines.append(f"┣{'╇'.join(heavy_segments)}┫")
 
         first_col = columns[0] if columns else None
 
@@ -182,28 +196,16 @@ class TableFormatter:
 
             # Skip row separator if this row is merged with the previous one
             if draw_line:
-                # Row separator
-                row_sep_segments = [f"─{'─' * col_widths[col]}─" for col in columns]
-                lines.append(f"┠{'┼'.join(row_sep_segments)}┨")
+                lines.append(row_separator)
 
-            cells: list[str] = []
-            for col in columns:
-                value = rows[i].get(col)
-                # For merged cells in first column, use empty space instead of value
-                # If _draw_line_above returns False, the row is merged with the previous one
-                if col == first_col and i > 0 and not draw_line:
-                    formatted_value = " " * col_widths[col]
-                else:
-                    formatted_value = self._format_value(value)
-                    if len(formatted_value) > self.MAX_COL_WIDTH:
-                        formatted_value = (
-                            formatted_value[: self.MAX_COL_WIDTH - 3] + "..."
-                        )
-                cells.append(f" {formatted_value.ljust(col_widths[col])} ")
-            lines.append(f"┃{'│'.join(cells)}┃")
+            formatted_row = formatted_rows[i]
+            # For merged cells in first column, use empty space instead of value
+            # If _draw_line_above returns False, the row is merged with the previous one
+            if i > 0 and not draw_line:
+                formatted_row[0] = ""
+            lines.append(row_template.format(*formatted_row))
 
         # Bottom border
-        bottom_segments = [f"━{'━' * col_widths[col]}━" for col in columns]
-        lines.append(f"┗{'┷'.join(bottom_segments)}┛")
+        lines.append(f"┗{'┷'.join(heavy_segments)}┛")
 
         return lines
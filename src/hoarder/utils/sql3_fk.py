@@ -2,6 +2,49 @@ import sqlite3
 from pathlib import Path
 from types import TracebackType
 
+# Throughput-oriented settings; synchronous=NORMAL is durable under WAL except for the
+# last commits on power loss, never OFF.
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA mmap_size = 268435456;",
+    "PRAGMA cache_size = -65536;",
+)
+
+
+def configure_connection(con: sqlite3.Connection) -> None:
+    """Apply the performance PRAGMAs to a connection.
+
+    Call once per connection, outside of a transaction. journal_mode is stored
+    in the database file, the remaining settings only last for the connection.
+    """
+    for pragma in _PRAGMAS:
+        _ = con.execute(pragma)
+
+
+def open_connection(
+    db_path: str | Path,
+    isolation_level: str | None = "",
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """Open a connection with foreign keys enabled and the performance PRAGMAs applied.
+
+    Args:
+        db_path: Path of the database file.
+        isolation_level: Passed through to sqlite3.connect; None leaves transaction
+            control entirely to the caller.
+        check_same_thread: Passed through to sqlite3.connect; False allows the
+            connection to be used from other threads, which then must serialize
+            their access to it.
+    """
+    con = sqlite3.connect(
+        db_path, isolation_level=isolation_level, check_same_thread=check_same_thread
+    )
+    _ = con.execute("PRAGMA foreign_keys = ON;")
+    configure_connection(con)
+    return con
+
 
 class Sqlite3FK:
     """
@@ -20,8 +63,7 @@ class Sqlite3FK:
 
     def __enter__(self) -> sqlite3.Connection:
         """Enter the context manager and return a connection with foreign keys enabled."""
-        self._conn = sqlite3.connect(self._db_path)
-        _ = self._conn.execute("PRAGMA foreign_keys = ON;")
+        self._conn = open_connection(self._db_path)
         return self._conn
 
     def __exit__(
@@ -5,8 +5,8 @@ from pathlib import Path, PurePath
 
 import pytest
 from hoarder import HoarderRepository
-from hoarder.archives import SfvArchive
-from hoarder.downloads import Download, RealFile
+from hoarder.archives import Algo, SfvArchive
+from hoarder.downloads import Download, RealFile, Verification, VerificationSource
 
 FROZEN_TS = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
 
@@ -139,6 +139,49 @@ def test_download_repository_persists_real_files(
         assert loaded_file.algo == original_file.algo
 
 
+def test_download_repository_persists_verifications(
+    hoarder_repo: HoarderRepository, compare_storage_path: Path
+) -> None:
+    """Test that verifications of the real_files in a download survive a roundtrip."""
+    real_files = _collect_files_from_directory(
+        compare_storage_path, PurePath("compare/files")
+    )
+    if len(real_files) < 3:
+        pytest.skip("Not enough files found in test_files/compare/files")
+
+    test_files = real_files[:3]
+    # First file gets two verifications, second one, third none
+    for real_file, n_verifications in zip(test_files, (2, 1, 0)):
+        assert real_file.hash_value is not None
+        for index in range(n_verifications):
+            real_file.verification.append(
+                Verification(
+                    real_file=real_file,
+                    source_type=VerificationSource.ARCHIVE,
+                    source_path=PurePath(f"sfv/files{index}.sfv"),
+                    source_storage_path=compare_storage_path,
+                    hash_value=real_file.hash_value,
+                    algo=Algo.CRC32,
+                    comment=f"verification {index}",
+                )
+            )
+
+    hoarder_repo.save_download(_build_download("verified files", test_files))
+    loaded = hoarder_repo.load_download("verified files")
+
+    assert [rf.path for rf in loaded.real_files] == [rf.path for rf in test_files]
+    for original_file, loaded_file in zip(test_files, loaded.real_files):
+        assert len(loaded_file.verification) == len(original_file.verification)
+        for original, restored in zip(
+            original_file.verification, loaded_file.verification
+        ):
+            assert restored.real_file is loaded_file
+            assert restored.source_path == original.source_path
+            assert restored.source_storage_path == compare_storage_path
+            assert restored.comment == original.comment
+            assert restored.verified
+
+
 def test_download_repository_empty_real_files(
     hoarder_repo: HoarderRepository, compare_storage_path: Path
 ) -> None:
@@ -193,6 +236,49 @@ def test_download_repository_updates_existing_download(
     assert len(loaded.real_files) == len(real_files)
 
 
+def test_download_repository_drops_removed_associations(
+    hoarder_repo: HoarderRepository, compare_storage_path: Path
+) -> None:
+    """Test that re-saving a download with fewer files removes stale associations."""
+    real_files = _collect_files_from_directory(
+        compare_storage_path, PurePath("compare/files")
+    )
+    if len(real_files) < 2:
+        pytest.skip("Not enough files found in test_files/compare/files")
+
+    hoarder_repo.save_download(_build_download("files", real_files))
+    hoarder_repo.save_download(_build_download("files", real_files[:1]))
+
+    loaded = hoarder_repo.load_download("files")
+
+    assert [rf.path for rf in loaded.real_files] == [real_files[0].path]
+
+
+def test_download_repository_resave_keeps_real_file_ids(
+    hoarder_repo: HoarderRepository, compare_storage_path: Path
+) -> None:
+    """Test that re-saving an unchanged download keeps rows and associations."""
+    real_files = _collect_files_from_directory(
+        compare_storage_path, PurePath("compare/files")
+    )
+    if not real_files:
+        pytest.skip("No files found in test_files/compare/files")
+    download = _build_download("files", real_files)
+
+    def association_rows() -> list[tuple[int, int, int]]:
+        return hoarder_repo._con.execute(
+            "SELECT rowid, download_id, real_file_id FROM download_real_files "
+            "ORDER BY rowid;"
+        ).fetchall()
+
+    hoarder_repo.save_download(download)
+    before = association_rows()
+    hoarder_repo.save_download(download)
+
+    assert association_rows() == before
+    assert len(before) == len(real_files)
+
+
 def test_download_repository_disallows_unknown_storage_path_on_save(
     hoarder_repo: HoarderRepository, compare_storage_path: Path
 ) -> None:
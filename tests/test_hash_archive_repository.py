@@ -1,5 +1,6 @@
 import logging
 import pathlib
+import sqlite3
 import subprocess
 import typing
 
@@ -115,6 +116,23 @@ def test_hnf_repositories(create_test_repo):
     assert repr(saved_hnf_file) == repr(retrieved_hnf_file)
 
 
+def test_sfv_repository_resave_replaces_file_entries(create_test_repo):
+    p = pathlib.Path("./test_files/sfv/files.sfv")
+    saved_sfv_file = SfvArchive.from_path(p.parent, pathlib.PurePath(p.name))
+    create_test_repo.save_hash_archive(saved_sfv_file)
+
+    # Drop one entry and save again over the existing archive
+    removed = next(iter(saved_sfv_file.files))
+    del saved_sfv_file.files[removed]
+    create_test_repo.save_hash_archive(saved_sfv_file)
+
+    retrieved_sfv_file = create_test_repo.load_hash_archive(
+        saved_sfv_file.storage_path, saved_sfv_file.path
+    )
+    assert removed not in retrieved_sfv_file.files
+    assert repr(saved_sfv_file) == repr(retrieved_sfv_file)
+
+
 def test_storage_path_not_allowed_error(tmpdir_factory):
     """Test that ValueError is raised for disallowed storage paths."""
     p = tmpdir_factory.mktemp("db")
@@ -192,3 +210,56 @@ def test_storage_path_validation_on_init(tmpdir_factory):
 
     # Verify the path was normalized
     assert sfv_path.resolve() in repo.allowed_storage_paths
+
+
+def test_repository_reuses_connection_until_closed(tmpdir_factory):
+    """Test that one repository instance serves several saves and loads until closed."""
+    p = tmpdir_factory.mktemp("db")
+    sfv_path = pathlib.Path("./test_files/sfv/files.sfv")
+    if not sfv_path.exists():
+        pytest.skip(f"Test file not found: {sfv_path}")
+
+    archive = SfvArchive.from_path(sfv_path.parent, pathlib.PurePath(sfv_path.name))
+    with HoarderRepository(pathlib.Path(p / "hoarder.db"), [sfv_path.parent]) as repo:
+        repo.save_hash_archive(archive)
+        repo.save_hash_archive(archive)
+        loaded = repo.load_hash_archive(archive.storage_path, archive.path)
+        assert repr(archive) == repr(loaded)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        repo.save_hash_archive(archive)
+
+
+@pytest.mark.parametrize("stored_algo", [0, 99])
+def test_load_rejects_unknown_algo(tmpdir_factory, stored_algo: int):
+    """Test that file entries with an unknown stored algo fail to load."""
+    p = tmpdir_factory.mktemp("db")
+    sfv_path = pathlib.Path("./test_files/sfv/files.sfv")
+    if not sfv_path.exists():
+        pytest.skip(f"Test file not found: {sfv_path}")
+
+    archive = SfvArchive.from_path(sfv_path.parent, pathlib.PurePath(sfv_path.name))
+    with HoarderRepository(pathlib.Path(p / "hoarder.db"), [sfv_path.parent]) as repo:
+        repo.save_hash_archive(archive)
+        with sqlite3.connect(p / "hoarder.db") as con:
+            _ = con.execute("UPDATE file_entries SET algo = ?;", (stored_algo,))
+        con.close()
+        with pytest.raises(ValueError):
+            repo.load_hash_archive(archive.storage_path, archive.path)
+
+
+def test_save_accepts_archive_subclasses(tmpdir_factory):
+    """Test that subclasses of a supported archive type can be saved."""
+    p = tmpdir_factory.mktemp("db")
+    sfv_path = pathlib.Path("./test_files/sfv/files.sfv")
+    if not sfv_path.exists():
+        pytest.skip(f"Test file not found: {sfv_path}")
+
+    class CustomSfvArchive(SfvArchive):
+        pass
+
+    archive = CustomSfvArchive.from_path(
+        sfv_path.parent, pathlib.PurePath(sfv_path.name)
+    )
+    with HoarderRepository(pathlib.Path(p / "hoarder.db"), [sfv_path.parent]) as repo:
+        repo.save_hash_archive(archive)
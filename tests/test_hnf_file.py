@@ -6,6 +6,7 @@ import pathlib
 import pytest
 import tests.test_case_file_info
 from hoarder.archives import HashNameArchive
+from hoarder.archives.hash_name_archive import HashEnclosure
 
 logger = logging.getLogger("hoarder.test_hnf_file")
 
@@ -26,6 +27,32 @@ def test_hnf_archives(list_hnf_file_paths: list[pathlib.Path]):
         hnf_archive = HashNameArchive.from_path(root, path)
         hnf_archives.append(hnf_archive)
     assert len(hnf_archives) == 4
-    assert sorted(itertools.chain(*map(lambda x: x.files, hnf_archives))) == sorted(
+    assert sorted(itertools.chain(*hnf_archives)) == sorted(
         tests.test_case_file_info.HNF_FILES
     )
+
+
+@pytest.mark.parametrize(
+    "name, enc, crc",
+    [
+        ("show - 01 [0A1B2C3D].mkv", HashEnclosure.SQUARE, "0a1b2c3d"),
+        ("show - 01 (0a1b2c3d).mkv", HashEnclosure.PAREN, "0a1b2c3d"),
+        ("archive [DEADBEEF].tar.gz", HashEnclosure.SQUARE, "deadbeef"),
+    ],
+)
+def test_hnf_enclosure_detection(tmp_path, name: str, enc: HashEnclosure, crc: str):
+    (tmp_path / name).write_bytes(b"")
+    hnf_archive = HashNameArchive.from_path(tmp_path, pathlib.PurePath(name))
+    assert hnf_archive.enc is enc
+    (file_entry,) = hnf_archive
+    assert file_entry.hash_value == bytes.fromhex(crc)
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["[0A1B2C3D].mkv", "show [0A1B2C3D]", "show [0A1B2C3D)", "show [0A1B2C3G].mkv"],
+)
+def test_hnf_rejects_names_without_hash(tmp_path, name: str):
+    (tmp_path / name).write_bytes(b"")
+    with pytest.raises(ValueError):
+        HashNameArchive.from_path(tmp_path, pathlib.PurePath(name))
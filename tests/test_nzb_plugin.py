@@ -1,11 +1,14 @@
 """Tests for the NZB password plugin."""
 
+import importlib
 import logging
 import os
 import pathlib
+import xml.etree.ElementTree
 
 import pytest
 from hoarder.passwords import NzbPasswordPlugin, PasswordStore
+from hoarder.passwords import nzb_password_plugin
 from hoarder.utils import TableFormatter
 
 logger = logging.getLogger("hoarder.tests.test_nzb_plugin")
@@ -20,6 +23,34 @@ def nzb_plugin() -> NzbPasswordPlugin:
     return NzbPasswordPlugin({"nzb_paths": nzb_paths})
 
 
+@pytest.fixture(params=["xml.etree", "lxml"])
+def xml_backend(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> str:
+    """Run a test against the stdlib parser and, if installed, against lxml."""
+    if request.param == "lxml":
+        try:
+            lxml_etree = importlib.import_module("lxml.etree")
+        except ImportError:
+            pytest.skip("lxml is not installed")
+        monkeypatch.setattr(nzb_password_plugin, "ET", lxml_etree)
+        monkeypatch.setattr(
+            nzb_password_plugin,
+            "_ITERPARSE_OPTIONS",
+            {"resolve_entities": False, "no_network": True},
+        )
+        monkeypatch.setattr(
+            nzb_password_plugin, "_PARSE_ERRORS", (lxml_etree.ParseError, ValueError)
+        )
+    else:
+        monkeypatch.setattr(nzb_password_plugin, "ET", xml.etree.ElementTree)
+        monkeypatch.setattr(nzb_password_plugin, "_ITERPARSE_OPTIONS", {})
+        monkeypatch.setattr(
+            nzb_password_plugin, "_PARSE_ERRORS", (xml.etree.ElementTree.ParseError,)
+        )
+    return request.param
+
+
 def test_nzb_plugin(nzb_plugin: NzbPasswordPlugin) -> None:
     password_store: PasswordStore = nzb_plugin.extract_passwords()
     formatter = TableFormatter(merge_first_column=True)
@@ -40,3 +71,83 @@ def test_nzb_plugin(nzb_plugin: NzbPasswordPlugin) -> None:
 
     assert "debian-12.11.0-amd64-netinst.iso" in password_store
     assert password_store["debian-12.11.0-amd64-netinst.iso"] == set(["guessme"])
+
+
+@pytest.mark.parametrize(
+    "file_name, title, password",
+    [
+        ("debian-12.11.0-amd64-netinst.iso.nzb", "debian-12.11.0-amd64-netinst.iso", None),
+        ("ubuntu-25.04-desktop-x64{{monkey}}.nzb", "ubuntu-25.04-desktop-x64", "monkey"),
+        ("{{qwerty}} Leap-16.0 .nzb", "Leap-16.0", "qwerty"),
+        ("title {{ with spaces }}.nzb", "title", " with spaces "),
+        ("dangling {{.nzb", "dangling {{", None),
+    ],
+)
+def test_extract_pw_from_nzb_filename(
+    file_name: str, title: str, password: str | None
+) -> None:
+    entry = NzbPasswordPlugin._extract_pw_from_nzb_filename(pathlib.PurePath(file_name))
+    assert entry.title == title
+    assert entry.password == password
+
+
+def test_extract_pw_from_nzb_filename_rejects_ambiguous_passwords() -> None:
+    with pytest.raises(ValueError):
+        NzbPasswordPlugin._extract_pw_from_nzb_filename(
+            pathlib.PurePath("title{{one}}{{two}}.nzb")
+        )
+
+
+def test_extract_pw_from_nzb_file_content(xml_backend: str) -> None:
+    nzb_file = pathlib.Path("test_files/nzb/archlinux-2025.07.01-x86_64.iso.nzb")
+    if not nzb_file.exists():
+        pytest.skip(f"Test file not found: {nzb_file}")
+
+    # Paths are streamed from disk, in-memory content is parsed as-is
+    assert NzbPasswordPlugin._extract_pw_from_nzb_file_content(nzb_file) == "letmein"
+    content = nzb_file.read_bytes()
+    assert NzbPasswordPlugin._extract_pw_from_nzb_file_content(content) == "letmein"
+    assert (
+        NzbPasswordPlugin._extract_pw_from_nzb_file_content(content.decode())
+        == "letmein"
+    )
+
+    no_password = pathlib.Path("test_files/nzb/ubuntu-25.04-desktop-x64{{monkey}}.nzb")
+    assert NzbPasswordPlugin._extract_pw_from_nzb_file_content(no_password) is None
+
+    # Content that is clearly not XML is rejected without being parsed
+    assert NzbPasswordPlugin._extract_pw_from_nzb_file_content(b"\x00" * 1024) is None
+
+    # Str content is parsed as decoded text, whatever encoding it declares
+    latin1 = (
+        '<?xml version="1.0" encoding="iso-8859-1"?>'
+        '<nzb xmlns="http://www.newzbin.com/DTD/2003/nzb">'
+        '<head><meta type="password">päss</meta></head></nzb>'
+    )
+    assert NzbPasswordPlugin._extract_pw_from_nzb_file_content(latin1) == "päss"
+    assert (
+        NzbPasswordPlugin._extract_pw_from_nzb_file_content(latin1.encode("latin-1"))
+        == "päss"
+    )
+
+    # Malformed XML is reported as no password by either parser
+    truncated = '<?xml version="1.0"?><nzb><head><meta type="password">'
+    assert NzbPasswordPlugin._extract_pw_from_nzb_file_content(truncated) is None
+    assert (
+        NzbPasswordPlugin._extract_pw_from_nzb_file_content(truncated.encode())
+        is None
+    )
+
+
+def test_extract_passwords_skips_ignored_dirs(tmp_path: pathlib.Path) -> None:
+    for directory in ["shows", ".git", "node_modules", "skipped"]:
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / f"{directory}{{{{secret}}}}.nzb").touch()
+
+    plugin = NzbPasswordPlugin(
+        {"nzb_paths": [str(tmp_path)], "ignore_dirs": ["skipped"]}
+    )
+    password_store = plugin.extract_passwords()
+
+    assert len(password_store) == 1
+    assert password_store["shows"] == {"secret"}
@@ -472,3 +472,78 @@ def test_clear_passwords_removes_from_store(password_store: PasswordStore):
     assert "title1" in password_store._store  # pyright: ignore[reportPrivateUsage]
     password_store.clear_passwords("title1")
     assert "title1" not in password_store._store  # pyright: ignore[reportPrivateUsage]
+
+
+def test_update_merges_in_place(
+    password_store: PasswordStore, password_store_2: PasswordStore
+):
+    """Test that update merges the other store without copying either."""
+    password_store.add_password("title1", "password1")
+    password_store_2.add_password("title1", "password2")
+    password_store_2.add_password("title2", "password3")
+
+    password_store.update(password_store_2)
+
+    assert password_store["title1"] == {"password1", "password2"}
+    assert password_store["title2"] == {"password3"}
+    # The merged sets must not be shared with the other store
+    password_store_2.add_password("title2", "password4")
+    assert password_store["title2"] == {"password3"}
+
+
+def test_update_skips_empty_titles(
+    password_store: PasswordStore, password_store_2: PasswordStore
+):
+    """Test that titles without passwords in the other store are not copied over."""
+    assert password_store_2["title1"] == set()
+
+    password_store.update(password_store_2)
+
+    assert "title1" not in password_store
+    assert len(password_store) == 0
+
+
+def test_add_many(password_store: PasswordStore):
+    """Test adding several pairs at once, including repeated titles."""
+    password_store.add_password("title1", "password1")
+
+    password_store.add_many(
+        [("title1", "password2"), ("title2", "password3"), ("title1", "password2")]
+    )
+
+    assert password_store["title1"] == {"password1", "password2"}
+    assert password_store["title2"] == {"password3"}
+    assert len(password_store) == 2
+
+
+def test_add_many_invalid_pair_leaves_store_unchanged(password_store: PasswordStore):
+    """Test that an invalid pair rejects the whole batch."""
+    with pytest.raises(ValueError):
+        password_store.add_many([("title1", "password1"), ("title2", "")])
+
+    assert len(password_store) == 0
+
+
+def test_add_password_shares_equal_passwords(password_store: PasswordStore):
+    """Test that an equal password added under two titles is one string object."""
+    # Built at runtime so the two strings start out as distinct objects
+    password_store.add_password("title1", "".join(["pass", "word"]))
+    password_store.add_password("title2", "".join(["pass", "word"]))
+
+    (first,) = password_store["title1"]
+    (second,) = password_store["title2"]
+    assert first is second
+
+
+def test_items(password_store: PasswordStore):
+    """Test the read-only (title, passwords) view."""
+    password_store.add_password("title1", "password1")
+    password_store.add_password("title1", "password2")
+    password_store.add_password("title2", "password3")
+
+    assert dict(password_store.items()) == {
+        "title1": {"password1", "password2"},
+        "title2": {"password3"},
+    }
+    with pytest.raises(TypeError):
+        password_store.items().mapping["title3"] = set()  # type: ignore [index]
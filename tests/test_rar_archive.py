@@ -1,10 +1,14 @@
+import io
+import os
 import pathlib
 import subprocess
+import types
 import typing
 
 import pytest
 import tests.test_case_file_info
-from hoarder.archives import RarArchive
+from hoarder.archives import FileEntry, RarArchive
+from hoarder.archives import rar_archive
 
 
 @pytest.mark.parametrize(
@@ -45,7 +49,7 @@ def test_read_file_content_validation(
 
             # Check if the file exists in both archive and compare directory
             if compare_file.exists():
-                archive_files = {f.path for f in archive.files}
+                archive_files = {f.path for f in archive}
                 if file_path in archive_files:
                     # Read content from archive
                     archive_content = archive.read_file(file_path)
@@ -63,3 +67,175 @@ def test_read_file_content_validation(
         pytest.skip(f"7zip not available or archive {rar_path} cannot be processed")
     except FileNotFoundError as e:
         pytest.skip(f"Required file not found: {e}")
+
+
+SLT_STDOUT = (
+    b"7-Zip 23.01 (x64)\r\n\r\n"
+    b"--\r\nPath = test.part1.rar\r\nType = Rar5\r\n\r\n"
+    b"----------\r\nPath = files/a=b.raw\r\nFolder = -\r\nCRC = 0A1B2C3D\r\n"
+    b"Comment = \r\n\r\n"
+    b"Path = files\r\nFolder = +\r\n"
+)
+
+
+def test_parse_slt_listing():
+    """Test parsing 7z technical listing output into one dict per block."""
+    assert rar_archive._parse_slt_listing(SLT_STDOUT) == [
+        {"Path": "test.part1.rar", "Type": "Rar5"},
+        {"Path": "files/a=b.raw", "Folder": "-", "CRC": "0A1B2C3D", "Comment": ""},
+        {"Path": "files", "Folder": "+"},
+    ]
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 16, 2**16])
+def test_read_slt_listing(monkeypatch: pytest.MonkeyPatch, read_size: int):
+    """Test that blocks split across pipe reads are parsed like the whole output."""
+    monkeypatch.setattr(rar_archive, "_PIPE_READ_SIZE", read_size)
+    stream = io.BufferedReader(io.BytesIO(SLT_STDOUT), buffer_size=read_size)
+
+    assert rar_archive._read_slt_listing(stream) == rar_archive._parse_slt_listing(
+        SLT_STDOUT
+    )
+
+
+def test_update_hash_values_falls_back_to_slow_crc32(monkeypatch: pytest.MonkeyPatch):
+    """Test the per-file fallback when the batched CRC32 run fails."""
+    monkeypatch.setattr(rar_archive, "_CRC32_BATCH_MIN_ENTRIES", 1)
+
+    class FailingBatchRarArchive(RarArchive):
+        def get_crc32_batch(self, entry_paths):
+            raise subprocess.CalledProcessError(2, "7z")
+
+        def get_crc32_slow(self, entry_path):
+            if pathlib.PurePath(entry_path).name == "broken.raw":
+                raise subprocess.CalledProcessError(2, "7z")
+            return b"\x01\x02\x03\x04"
+
+    files = [
+        FileEntry(pathlib.PurePath("files"), 0, True),
+        FileEntry(pathlib.PurePath("files/stock.raw"), 1, False),
+        FileEntry(pathlib.PurePath("files/broken.raw"), 1, False),
+    ]
+    archive = FailingBatchRarArchive(
+        pathlib.Path("."), pathlib.PurePath("test.rar"), files
+    )
+
+    archive.update_hash_values()
+
+    hashes = {entry.str_path: entry.hash_value for entry in archive}
+    assert hashes == {
+        "files": b"\x00\x00\x00\x00",
+        "files/stock.raw": b"\x01\x02\x03\x04",
+        "files/broken.raw": None,
+    }
+
+
+@pytest.mark.parametrize(
+    "count, size, free_space, expect_batch",
+    [
+        (rar_archive._CRC32_BATCH_MIN_ENTRIES, 1000, 10**12, True),
+        (rar_archive._CRC32_BATCH_MIN_ENTRIES - 1, 1000, 10**12, False),
+        (rar_archive._CRC32_BATCH_MIN_ENTRIES, 2**30, 10**12, False),
+        (rar_archive._CRC32_BATCH_MIN_ENTRIES, 1000, 1000, False),
+    ],
+)
+def test_update_hash_values_batches_only_many_small_files(
+    monkeypatch: pytest.MonkeyPatch,
+    count: int,
+    size: int,
+    free_space: int,
+    expect_batch: bool,
+):
+    """Test that the batch extraction is limited to many files of a bounded size."""
+    monkeypatch.setattr(
+        rar_archive.shutil,
+        "disk_usage",
+        lambda path: types.SimpleNamespace(free=free_space),
+    )
+    batch_calls: list[list[pathlib.PurePath]] = []
+
+    class RecordingRarArchive(RarArchive):
+        def get_crc32_batch(self, entry_paths):
+            paths = list(entry_paths)
+            batch_calls.append(paths)
+            return {str(path): b"\x0a\x0b\x0c\x0d" for path in paths}
+
+        def get_crc32_slow(self, entry_path):
+            return b"\x01\x02\x03\x04"
+
+    archive = RecordingRarArchive(
+        pathlib.Path("."),
+        pathlib.PurePath("test.rar"),
+        [
+            FileEntry(pathlib.PurePath(f"files/{i}.raw"), size, False)
+            for i in range(count)
+        ],
+    )
+
+    archive.update_hash_values()
+
+    assert bool(batch_calls) == expect_batch
+    expected = b"\x0a\x0b\x0c\x0d" if expect_batch else b"\x01\x02\x03\x04"
+    assert all(entry.hash_value == expected for entry in archive)
+
+
+def test_presentation_scalar_keys():
+    """Test that only the archive's public state shows up as header fields."""
+    archive = RarArchive(pathlib.Path("."), pathlib.PurePath("test.rar"))
+    archive.info = "not shown"
+
+    scalar = archive.to_presentation()["scalar"]
+    assert list(scalar) == [
+        "type",
+        "path",
+        "is_deleted",
+        "n_volumes",
+        "password",
+        "scheme",
+        "version",
+    ]
+    assert "info" not in repr(archive)
+
+
+def test_list_rar_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path):
+    """Test that listings are cached per volume state and handed out as copies."""
+    volumes = [tmp_path / "test.part1.rar", tmp_path / "test.part2.rar"]
+    for volume in volumes:
+        _ = volume.write_bytes(b"rar")
+    calls: list[pathlib.Path] = []
+
+    def fake_list_rar(path: pathlib.Path, password: str | None):
+        calls.append(path)
+        return [{"Path": "files/stock.raw", "Size": "1"}]
+
+    monkeypatch.setattr(RarArchive, "_list_rar_uncached", staticmethod(fake_list_rar))
+
+    listing = RarArchive.list_rar(volumes[0], "secret", volumes)
+    listing[0]["Size"] = "changed"
+    assert RarArchive.list_rar(volumes[0], "secret", volumes) == [
+        {"Path": "files/stock.raw", "Size": "1"}
+    ]
+    assert len(calls) == 1
+    assert all("secret" not in repr(key) for key in rar_archive._list_cache)
+
+    # Changing a later volume invalidates the listing
+    _ = volumes[1].write_bytes(b"rar volume")
+    _ = RarArchive.list_rar(volumes[0], "secret", volumes)
+    assert len(calls) == 2
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses a shell script as 7z")
+def test_list_rar_failure_keeps_stderr(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+):
+    """Test that a failing 7z listing reports 7z's diagnostics."""
+    fake_7z = tmp_path / "7z"
+    _ = fake_7z.write_text("#!/bin/sh\necho 'ERROR: Wrong password' >&2\nexit 2\n")
+    fake_7z.chmod(0o755)
+    monkeypatch.setattr(rar_archive, "SEVENZIP", fake_7z)
+
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        RarArchive._list_rar_uncached(tmp_path / "test.rar", "wrong")
+
+    assert exc_info.value.returncode == 2
+    assert b"Wrong password" in exc_info.value.stderr
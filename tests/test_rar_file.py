@@ -28,14 +28,14 @@ def test_rar_archives_set(
     path = pathlib.PurePath(main_archive_path.name)
     rar_archive = RarArchive.from_path(root, path, password=password)
     logger.debug(f"== Listing {main_archive_path}")
-    for f in rar_archive.files:
+    for f in rar_archive:
         logger.debug(f)
     logger.debug("==============================")
     assert len(rar_archive.files) == n_contained_files
     rar_archive.update_hash_values()
     logger.info(f"+ {list(map(lambda x: x.path,rar_archive))}")
     logger.info(f"* {list(map(lambda x: x.path,compare_files_list))}")
-    assert sorted(rar_archive.files) == sorted(compare_files_list)
+    assert sorted(rar_archive) == sorted(compare_files_list)
     assert rar_archive.full_path == main_archive_path
     assert rar_archive.scheme == naming_scheme
     assert rar_archive.n_volumes == n_volumes
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import datetime as dt
 from pathlib import Path, PurePath
 
@@ -95,6 +96,23 @@ def test_real_file_repository_persists_verifications(
     assert loaded_verification.verified
 
 
+def test_real_file_repository_used_from_another_thread(
+    hoarder_repo: HoarderRepository, compare_storage_path: Path
+) -> None:
+    entry = next(file for file in case_files.TEST_FILES if not file.is_dir)
+    real_file = _build_real_file(entry, compare_storage_path)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(hoarder_repo.save_real_file, real_file).result()
+        loaded = executor.submit(
+            hoarder_repo.load_real_file, compare_storage_path, "compare" / entry.path
+        ).result()
+
+    assert loaded.hash_value == real_file.hash_value
+    # Loading by column name must not leave a row factory on the shared connection
+    assert hoarder_repo._con.row_factory is None
+
+
 def test_real_file_repository_disallows_unknown_storage_path_on_save(
     hoarder_repo: HoarderRepository, compare_storage_path: Path
 ) -> None:
@@ -133,3 +151,19 @@ def test_real_file_repository_validates_paths_on_init(tmp_path) -> None:
         pytest.skip(f"Fixture path missing: {existing_path}")
     repo = HoarderRepository(tmp_path / "db.sqlite", [existing_path])
     assert existing_path.resolve() in repo.allowed_storage_paths
+
+
+def test_relative_storage_path_follows_working_directory(tmp_path, monkeypatch) -> None:
+    storage = tmp_path / "storage"
+    storage.mkdir()
+    other = tmp_path / "other"
+    (other / "storage").mkdir(parents=True)
+    repo = HoarderRepository(tmp_path / "db.sqlite", [storage])
+
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        repo.load_real_file(Path("storage"), PurePath("missing"))
+
+    monkeypatch.chdir(other)
+    with pytest.raises(ValueError):
+        repo.load_real_file(Path("storage"), PurePath("missing"))
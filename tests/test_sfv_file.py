@@ -18,7 +18,7 @@ def test_sfv_files(sfv_data_tuple):
     root = full_path.parent
     path = pathlib.PurePath(full_path.name)
     sfv_archive = SfvArchive.from_path(root, path)
-    for a, b in zip(sorted(sfv_archive.files), sorted(sfv_data_tuple[1])):
+    for a, b in zip(sorted(sfv_archive), sorted(sfv_data_tuple[1])):
         assert a.path == b.path
         assert a.is_dir == b.is_dir
         assert a.hash_value == b.hash_value